@@ -21,6 +21,10 @@ class Attendee:
         friends = [None if f == '' else f for f in data['friends']]
         return cls(data['name'], data['age'], data['unit'], data['is_female'], friends)
 
+    def __reduce__(self):
+        # __dict__ is a method here, so pickle and copy rebuild the attendee from its serialized form
+        return type(self).from_dict, (self.__dict__(),)
+
     
     def add_friend(self, friend_name: str):
         if not friend_name:
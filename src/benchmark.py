@@ -0,0 +1,157 @@
+import argparse
+import datetime
+import json
+import logging
+import os
+import platform
+import tempfile
+import time
+import numpy as np
+from candidates import age_window_candidates
+from conference import Conference
+from local_search import SimulatedAnnealing
+from main import make_groups
+from neighborhoods import SwapNeighborhood
+from objective import Objective
+from pulp_approach import solve_subset
+from scoring import shared_score_cache
+from stats import RunStats
+from synthetic import synthetic_roster
+
+SIZES = [100, 500, 1000, 5000]
+GROUP_SIZE = 7
+WINDOW_SIZE = 3
+SCORE_BATCH = 100_000
+SWAP_BATCH = 100_000
+# Scoring every swap is quadratic in the roster, so the full get_best_swap scan is only timed up to here
+FULL_SWAP_SCAN_LIMIT = 1000
+OPTIMIZE_ITERATIONS = 200_000
+
+
+def _timed(function):
+    start = time.perf_counter()
+    result = function()
+    return result, time.perf_counter() - start
+
+
+def _result(benchmark, num_attendees, seconds, operations=None, **details):
+    result = {'benchmark': benchmark, 'attendees': num_attendees, 'seconds': seconds}
+    if operations is not None:
+        result['operations'] = operations
+        result['operations_per_second'] = operations / seconds if seconds else None
+    result.update(details)
+    logging.info(f"{benchmark} ({num_attendees} attendees): {seconds:.3f}s"
+                 + (f", {result['operations_per_second']:.0f}/s" if operations else ""))
+    return result
+
+
+def make_conference(attendees, json_file) -> Conference:
+    attendees = sorted(attendees, key=lambda a: a.age)
+    return Conference(make_groups(attendees, max(1, len(attendees) // GROUP_SIZE)), json_file)
+
+
+def bench_scoring(conference: Conference, rng):
+    n = len(conference.registry)
+    results = []
+
+    shared_score_cache().clear()
+    _, seconds = _timed(lambda: [g.score() for g in conference.groups])
+    results.append(_result('group_score', n, seconds, len(conference.groups)))
+
+    rows = np.array([rng.choice(n, size=GROUP_SIZE, replace=False) for _ in range(SCORE_BATCH)])
+    _, seconds = _timed(lambda: conference.engine.score_batch(rows))
+    results.append(_result('score_batch', n, seconds, SCORE_BATCH))
+    return results
+
+
+def bench_swaps(conference: Conference, rng):
+    n = len(conference.registry)
+    results = []
+    index_matrix = conference.index_matrix()
+    group_scores = conference.group_scores(index_matrix)
+    sizes = (index_matrix != conference.engine.table.pad).sum(axis=1)
+    g1 = rng.integers(len(index_matrix), size=SWAP_BATCH)
+    g2 = (g1 + rng.integers(1, len(index_matrix), size=SWAP_BATCH)) % len(index_matrix)
+    a1 = (rng.random(SWAP_BATCH) * sizes[g1]).astype(np.int64)
+    a2 = (rng.random(SWAP_BATCH) * sizes[g2]).astype(np.int64)
+    _, seconds = _timed(lambda: conference.swap_delta(index_matrix, group_scores, g1, a1, g2, a2))
+    results.append(_result('swap_delta', n, seconds, SWAP_BATCH))
+
+    if n <= FULL_SWAP_SCAN_LIMIT:
+        (_, _, _, _, delta, _), seconds = _timed(lambda: conference.get_best_swap(good_enough=np.inf))
+        results.append(_result('get_best_swap', n, seconds, best_delta=delta))
+
+    neighborhood = SwapNeighborhood(conference.engine)
+    (_, _, _, _, delta, _), seconds = _timed(lambda: conference.get_best_swap(good_enough=np.inf,
+                                                                             neighborhood=neighborhood))
+    results.append(_result('get_best_swap_neighborhood', n, seconds, best_delta=delta,
+                           candidates=len(neighborhood.codes)))
+    return results
+
+
+def bench_window(conference: Conference):
+    n = len(conference.registry)
+    results = []
+    max_groups = min(WINDOW_SIZE, len(conference.groups))
+    start = len(conference.groups) // 2 - max_groups // 2
+    _, (subset, max_group_size, min_group_size, max_groups, initial_groups) = conference._window(
+        range(start, start + max_groups))
+
+    obj_func = Objective(subset)
+    count, seconds = _timed(lambda: sum(1 for _ in age_window_candidates(obj_func, max_group_size, min_group_size)))
+    results.append(_result('candidate_enumeration', n, seconds, count))
+
+    for mode in ('enumerate', 'column_generation'):
+        found, seconds = _timed(lambda: solve_subset(subset, max_group_size, min_group_size, max_groups, mode=mode,
+                                                     initial_groups=initial_groups, cache_dir=None))
+        results.append(_result(f'solve_subset_{mode}', n, seconds,
+                               total_score=sum(g['score'] for g in found if g)))
+    return results
+
+
+def bench_optimize(conference: Conference, seed):
+    n = len(conference.registry)
+    start_score = conference.score()
+    annealing = SimulatedAnnealing(iterations=OPTIMIZE_ITERATIONS, seed=seed)
+    stats = RunStats()
+    _, seconds = _timed(lambda: conference.optimize(max_failed_tries=1, local_search=annealing, stats=stats))
+    return [_result('optimize_annealing', n, seconds, start_score=start_score, end_score=conference.score(),
+                    stats=stats.as_dict())]
+
+
+def run_benchmarks(sizes=SIZES, seed=0, skip_solver=False):
+    rng = np.random.default_rng(seed)
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for n in sizes:
+            attendees, seconds = _timed(lambda: synthetic_roster(n, seed=seed))
+            results.append(_result('synthetic_roster', n, seconds, n))
+            conference = make_conference(attendees, os.path.join(tmp_dir, f'conference_{n}.json'))
+            results += bench_scoring(conference, rng)
+            results += bench_swaps(conference, rng)
+            if not skip_solver:
+                results += bench_window(conference)
+                results += bench_optimize(conference, seed)
+    return {'started': datetime.datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'machine': platform.machine(),
+            'seed': seed,
+            'results': results}
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s:%(levelname)s:%(message)s')
+    parser = argparse.ArgumentParser(description="Time scoring, swaps, candidate enumeration, CBC and optimize "
+                                                 "on synthetic rosters")
+    parser.add_argument("--sizes", type=int, nargs='+', default=SIZES)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--skip_solver", action='store_true', help="Skip the CBC and optimize benchmarks")
+    parser.add_argument("--output", default='results/benchmark.json', help="Path of the JSON results to write")
+    args = parser.parse_args()
+
+    report = run_benchmarks(args.sizes, args.seed, args.skip_solver)
+    os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    logging.info(f"Wrote {len(report['results'])} results to {args.output}")
@@ -0,0 +1,78 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import numpy as np
+from objective import Objective
+
+CANDIDATE_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'results', 'candidates')
+# Bump when the file layout or the meaning of a cached score changes
+CACHE_FORMAT_VERSION = 2
+
+
+def cache_key(obj_func: Objective, max_size: int, min_size: int) -> str:
+    """
+    Hash of everything the screened candidates and their scores depend on: the window's attendees (with
+    their ages, units and buddies), the size bounds, and the engine's weights and rules.
+    """
+    engine = obj_func.engine
+    attendees = sorted((a.__dict__() for a in obj_func.registry), key=lambda a: a['name'])
+    config = {'version': CACHE_FORMAT_VERSION,
+              'attendees': attendees,
+              'max_size': max_size,
+              'min_size': min_size,
+              'required_groupings': sorted(sorted(rg) for rg in obj_func.required_groupings),
+              'required_separations': sorted(sorted(rs) for rs in obj_func.required_separations),
+              'scoring': {k: v for k, v in engine.config.as_dict().items()
+                          if k not in ('required_groupings', 'required_separations')}}
+    return hashlib.sha256(json.dumps(config, sort_keys=True).encode()).hexdigest()
+
+
+def _cache_path(cache_dir, key):
+    return os.path.join(cache_dir, f"{key}.npz")
+
+
+def load_candidates(obj_func: Objective, max_size: int, min_size: int, cache_dir=CANDIDATE_CACHE_DIR):
+    """
+    The cached (groups, scores) for this window, with groups as sorted tuples of ``obj_func`` registry ids,
+    or None on a miss
+    """
+    path = _cache_path(cache_dir, cache_key(obj_func, max_size, min_size))
+    try:
+        with np.load(path, allow_pickle=False) as data:
+            names, groups, scores = data['names'], data['groups'], data['scores']
+    except (OSError, KeyError, ValueError) as e:
+        if os.path.exists(path):
+            logging.warning(f"Ignoring unreadable candidate cache {path}: {e}")
+        return None
+
+    # Stored ids index the sorted names; map them onto this registry, keeping the padding value as padding
+    to_registry = np.array(obj_func.registry.ids(names.tolist()) + (-1,), dtype=np.int64)
+    rows = to_registry[groups.astype(np.int64)].tolist()
+    groups = [tuple(sorted(i for i in row if i >= 0)) for row in rows]
+    logging.debug(f"Loaded {len(groups)} candidates from {path}")
+    return groups, scores.tolist()
+
+
+def save_candidates(obj_func: Objective, max_size: int, min_size: int, groups, scores,
+                    cache_dir=CANDIDATE_CACHE_DIR):
+    """Store screened candidates and their scores; written atomically, so concurrent runs never see half a file"""
+    names = sorted(obj_func.registry.names.tolist())
+    pad = len(names)
+    to_sorted = np.full(len(obj_func.registry) + 1, pad, dtype=np.int64)
+    to_sorted[list(obj_func.registry.ids(names))] = np.arange(pad)
+    padded = obj_func.table.index_matrix(groups) if groups else np.zeros((0, max_size), dtype=np.int64)
+    compact = to_sorted[padded].astype(np.uint16 if pad < np.iinfo(np.uint16).max else np.uint32)
+
+    os.makedirs(cache_dir, exist_ok=True)
+    path = _cache_path(cache_dir, cache_key(obj_func, max_size, min_size))
+    fd, tmp_path = tempfile.mkstemp(dir=cache_dir, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            np.savez_compressed(f, names=np.array(names), groups=compact, scores=np.asarray(scores, dtype=float))
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    logging.debug(f"Saved {len(groups)} candidates to {path}")
@@ -0,0 +1,73 @@
+import itertools
+from objective import Objective
+from stats import NULL_STATS, RunStats
+
+
+def required_blocks(obj_func: Objective) -> list[tuple[int, ...]]:
+    """
+    Registry ids grouped into indivisible blocks: the members of each required grouping (merged when
+    groupings overlap) form one block, everyone else is a block of one.
+    """
+    registry = obj_func.registry
+    parent = list(range(len(registry)))
+
+    def root(i):
+        while parent[i] != i:
+            i = parent[i]
+        return i
+
+    for rg in obj_func.required_groupings:
+        ids = registry.ids(rg)
+        for other in ids[1:]:
+            parent[root(other)] = root(ids[0])
+    blocks = {}
+    for i in range(len(registry)):
+        blocks.setdefault(root(i), []).append(i)
+    return [tuple(b) for b in blocks.values()]
+
+
+def age_window_candidates(obj_func: Objective, max_size: int, min_size: int, stats: RunStats = NULL_STATS):
+    """
+    Lazily yield every group (a sorted tuple of registry ids) that Objective.screen would accept.
+
+    Blocks are sorted by youngest age.  Each group is generated exactly once, from its youngest block, by
+    combining only the later blocks that fit inside that block's age window, so the work scales with the
+    number of feasible groups rather than with C(n, max_size).  Once exhausted, the number of extensions
+    rejected for size or a separation is added to ``stats`` as candidates_rejected.
+    """
+    blocks = required_blocks(obj_func)
+    ages = obj_func.table.ages
+    max_age_range = obj_func.engine.max_age_range
+    sizes = [len(b) for b in blocks]
+    lo = [ages[list(b)].min() for b in blocks]
+    hi = [ages[list(b)].max() for b in blocks]
+
+    # Blocks that share a required separation can never be together
+    separation_of = {}
+    for rule, rs in enumerate(obj_func.required_separations):
+        for i in obj_func.registry.ids(rs):
+            separation_of.setdefault(i, []).append(rule)
+    rules = [[r for i in b for r in separation_of.get(i, [])] for b in blocks]
+    usable = [sizes[b] <= max_size and hi[b] - lo[b] <= max_age_range and len(set(rules[b])) == len(rules[b])
+              for b in range(len(blocks))]
+
+    rejected = 0
+
+    def extend(members, size, used_rules, window, start):
+        nonlocal rejected
+        if size >= min_size:
+            yield tuple(sorted(members))
+        for k in range(start, len(window)):
+            b = window[k]
+            if size + sizes[b] > max_size or not used_rules.isdisjoint(rules[b]):
+                rejected += 1
+                continue
+            yield from extend(members + blocks[b], size + sizes[b], used_rules.union(rules[b]), window, k + 1)
+
+    order = sorted((b for b in range(len(blocks)) if usable[b]), key=lambda b: (lo[b], b))
+    for pos, anchor in enumerate(order):
+        youngest = lo[anchor]
+        window = [b for b in itertools.takewhile(lambda b: lo[b] - youngest <= max_age_range, order[pos + 1:])
+                  if hi[b] - youngest <= max_age_range]
+        yield from extend(blocks[anchor], sizes[anchor], frozenset(rules[anchor]), window, 0)
+    stats.count('candidates_rejected', rejected)
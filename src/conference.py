@@ -1,39 +1,178 @@
 from attendee import Attendee
-from group import Group
-from copy import deepcopy
-from common import get_attendee_by_name
+from group import Group, make_engine
+from journal import MoveJournal, atomic_write_json
+from local_search import LocalSearch
+from neighborhoods import SwapNeighborhood
+from concurrent.futures import ProcessPoolExecutor
+from collections import deque
+from registry import AttendeeRegistry
+import solution_file
+from stats import NULL_STATS, RunStats
+from window_scheduler import WindowScheduler
 import json
-from pulp_approach import pulp_to_group, solve_subset
+from pulp_approach import partition_bound, pulp_to_group, solve_subset
 import logging
 import numpy as np
 import datetime
 import random
+import time
 
 MAX_FAILED_TRIES = 10
 MEAN_WEIGHT = 1
 MIN_WEIGHT = 0
+WINDOW_SIZE = 3
+# Take a full snapshot after this many seconds or accepted moves since the last one, whichever comes first
+SNAPSHOT_INTERVAL = 60
+SNAPSHOT_MOVES = 100
+# With plateau detection on, a gain smaller than this over the plateau window counts as no progress
+PLATEAU_TOLERANCE = 1e-6
+# Groups on each side (in age order) of a changed group that are re-solved with it on a roster update
+UPDATE_NEIGHBORS = 1
+
+
+def _solve_window(initial_groups, max_group_size, min_group_size, max_groups, solver_mode, collect_stats=False,
+                  time_limit=None, solver_options=None, cache_dir=None):
+    """
+    Process-pool entry point: re-partition one dissolved window, given as its groups' attendees.  Returns the
+    solver's groups, the worker's RunStats.as_dict() (empty unless ``collect_stats``) and the seconds the
+    solve took.
+    """
+    subset = [a for attendees in initial_groups for a in attendees]
+    stats = RunStats() if collect_stats else NULL_STATS
+    start_time = time.monotonic()
+    found_groups = solve_subset(subset, max_group_size, min_group_size, max_groups, mode=solver_mode,
+                                initial_groups=initial_groups, cache_dir=cache_dir, stats=stats,
+                                time_limit=time_limit, solver_options=solver_options)
+    return found_groups, stats.as_dict(), time.monotonic() - start_time
 
 
 class Conference:
-    def __init__(self, groups, json_file):
+    """
+    A partition of the roster into groups.  ``json_file`` is where snapshots go: a path ending in .npz uses
+    the compact solution format (see solution_file), anything else the JSON one.  Pass ``registry`` and
+    ``engine`` to share ones already built over the same attendees instead of building new ones.
+    """
+    def __init__(self, groups, json_file, registry: AttendeeRegistry | None = None, engine=None):
         self.groups = sorted(groups, key=lambda g: np.mean([a.age for a in g.attendees]))
         self.json_file = json_file
-    
+        self.registry = registry if registry is not None else AttendeeRegistry(self._flatten_groups(self.groups))
+        self.engine = engine if engine is not None else make_engine(self.registry)
+        self.stats = NULL_STATS
+        self.window_scheduler = WindowScheduler()
+        self._saved_roster = None
+        # Sequence number of the last journaled move these groups contain
+        self.move_sequence = 0
+
     def __dict__(self):
-        return {'groups': [g.__dict__() for g in self.groups]}
+        return {'groups': [g.__dict__() for g in self.groups], 'sequence': self.move_sequence}
 
     @classmethod
     def from_dict(cls, data, conference_json_file):
         groups = [Group.from_dict(g) for g in data['groups']]
-        return cls(groups, conference_json_file)
+        conference = cls(groups, conference_json_file)
+        conference.move_sequence = data.get('sequence', 0)
+        return conference
     
+    @classmethod
+    def from_group_ids(cls, registry: AttendeeRegistry, group_ids, json_file, engine=None):
+        """A conference over ``registry`` whose groups are given as sequences of registry ids"""
+        groups = [Group(registry.attendees_for(ids)) for ids in group_ids]
+        return cls(groups, json_file, registry=registry, engine=engine)
+
+    @classmethod
+    def load_compact(cls, solution_path, roster: AttendeeRegistry | str | None = None, json_file=None):
+        """
+        Load a compact solution file.  ``roster`` is the registry it was saved against, or the path of its
+        roster file (by default the one beside it).  Snapshots go to ``json_file``, by default the same file.
+        """
+        roster_path = None
+        if not isinstance(roster, AttendeeRegistry):
+            roster_path = roster or solution_file.roster_path_for(solution_path)
+            roster = solution_file.load_roster(roster_path)
+        json_file = json_file or solution_path
+        conference = cls.from_group_ids(roster, solution_file.load_solution(solution_path, roster), json_file)
+        conference.move_sequence = solution_file.load_sequence(solution_path)
+        if solution_file.is_solution_file(json_file) and roster_path == solution_file.roster_path_for(json_file):
+            # Saving back to the same place need not rewrite the roster
+            conference._saved_roster = roster_path, roster.fingerprint
+        return conference
+
+    def save_compact(self, solution_path, roster_path=None):
+        """
+        Save the groups as registry ids to ``solution_path``.  The roster is written to ``roster_path`` (by
+        default beside the solution) only when this conference has not already written the same roster there.
+        """
+        roster_path = roster_path or solution_file.roster_path_for(solution_path)
+        if self._saved_roster != (roster_path, self.registry.fingerprint):
+            solution_file.save_roster(self.registry, roster_path)
+            self._saved_roster = roster_path, self.registry.fingerprint
+        solution_file.save_solution(solution_path, self.registry, self.group_ids(), sequence=self.move_sequence)
+
+    def clone(self, json_file=None) -> 'Conference':
+        """
+        A copy whose groups can change independently.  Only the group lists are copied; the attendees,
+        registry and scoring engine are shared.
+        """
+        conference = Conference([Group(list(g.attendees)) for g in self.groups], json_file or self.json_file,
+                                registry=self.registry, engine=self.engine)
+        conference.move_sequence = self.move_sequence
+        return conference
+
+    @classmethod
+    def resume(cls, json_file):
+        """
+        Load the latest snapshot in ``json_file`` and replay the moves journaled after it, skipping any the
+        snapshot already contains
+        """
+        if solution_file.is_solution_file(json_file):
+            conference = cls.load_compact(json_file)
+        else:
+            with open(json_file, 'r') as f:
+                conference = cls.from_dict(json.load(f), json_file)
+        moves = MoveJournal.for_snapshot(json_file).moves(after=conference.move_sequence)
+        for sequence, groups in moves:
+            conference.apply_move(groups)
+            conference.move_sequence = sequence
+        if moves:
+            logging.info(f"Replayed {len(moves)} journaled moves onto {json_file}")
+        return conference
+
+    def save(self):
+        """Atomically snapshot the conference to its file, in the compact format if it ends in .npz"""
+        if solution_file.is_solution_file(self.json_file):
+            self.save_compact(self.json_file)
+        else:
+            atomic_write_json(self.json_file, self.__dict__())
+
+    def _group_keys(self) -> set[frozenset]:
+        return set(self._group_key_list())
+
+    def _group_key_list(self) -> list[frozenset]:
+        return [frozenset(a.name for a in g.attendees) for g in self.groups]
+
+    def changed_groups(self, previous_keys: set[frozenset]) -> list[list[str]]:
+        """Names in each current group whose membership is not in ``previous_keys``"""
+        return [sorted(a.name for a in g.attendees) for g in self.groups
+                if frozenset(a.name for a in g.attendees) not in previous_keys]
+
+    def apply_move(self, groups: list[list[str]]):
+        """Replace the groups holding these attendees with ``groups``; a move already applied is a no-op"""
+        moved = {name for names in groups for name in names}
+        kept = [g for g in self.groups if not any(a.name in moved for a in g.attendees)]
+        replaced = [a.name for g in self.groups if g not in kept for a in g.attendees]
+        if sorted(replaced) != sorted(moved):
+            raise ValueError(f"Move {groups} does not re-partition whole groups of this conference")
+        new_groups = kept + [Group([self.registry.by_name(name) for name in names]) for names in groups]
+        self.groups = sorted(new_groups, key=lambda g: np.mean([a.age for a in g.attendees]))
+
     @classmethod
     def from_pulp_json(cls, json_file, attendees_list, conference_json_file):
         with open(json_file, 'r') as f:
             data = json.load(f)
+        registry = attendees_list if isinstance(attendees_list, AttendeeRegistry) else AttendeeRegistry(attendees_list)
         groups = []
         for pulp_group in data:
-            groups.append(Group([get_attendee_by_name(name, attendees_list) for name in pulp_group['names']]))
+            groups.append(Group([registry.by_name(name) for name in pulp_group['names']]))
         return cls(groups, conference_json_file)
 
     @property
@@ -49,74 +188,158 @@ class Conference:
         """
         A conference's score is the lowest group score plus the median score times some weighting factor
         """
-        group_scores = [g.score() for g in self.groups]
+        return self._conference_score(self.group_scores())
+
+    def group_ids(self) -> list[tuple[int, ...]]:
+        """The current groups as tuples of registry ids"""
+        return [self.registry.ids_of(g.attendees) for g in self.groups]
+
+    def index_matrix(self) -> np.ndarray:
+        """The current groups as a padded matrix of registry ids"""
+        return self.engine.table.index_matrix(self.group_ids())
+
+    def group_scores(self, index_matrix=None) -> np.ndarray:
+        if index_matrix is None:
+            index_matrix = self.index_matrix()
+        with self.stats.timer('scoring'):
+            return self.engine.score_batch(index_matrix, use_cache=True)
+
+    def buddyless_counts(self, index_matrix=None) -> np.ndarray:
+        """How many members of each group have none of their buddies in it"""
+        if index_matrix is None:
+            index_matrix = self.index_matrix()
+        table = self.engine.table
+        buddies = table.friend_graph.buddies_in_groups(index_matrix)
+        return ((buddies == 0) & table.is_real[index_matrix]).sum(axis=1)
+
+    @staticmethod
+    def _conference_score(group_scores) -> float:
         return (MIN_WEIGHT * min(group_scores)) + (MEAN_WEIGHT * np.mean(group_scores))
+
+    def bound(self, min_group_size=None, max_group_size=None, time_limit=None) -> float:
+        """
+        An upper bound on the score of any conference of this roster with as many groups as this one, each
+        sized between the current smallest and largest group (or the given sizes), from partition_bound.
+        A conference scores at most (MIN_WEIGHT + MEAN_WEIGHT) times its mean group score.
+        """
+        sizes = [len(g.attendees) for g in self.groups]
+        with self.stats.timer('bound'):
+            total, lp_value = partition_bound(self._flatten_groups(self.groups), len(self.groups),
+                                              max_group_size or max(sizes), min_group_size or min(sizes),
+                                              [g.attendees for g in self.groups], stats=self.stats,
+                                              time_limit=time_limit)
+        logging.debug(f"Partition bound {total}, restricted master LP value {lp_value}")
+        return (MIN_WEIGHT + MEAN_WEIGHT) * total / len(self.groups)
+
+    @staticmethod
+    def optimality_gap(score, bound) -> float:
+        """How far ``score`` may be from optimal, relative to ``bound``"""
+        if bound == np.inf:
+            return np.inf
+        return max(0.0, bound - score) / max(abs(bound), 1e-9)
     
     def swap(self, g1, a1, g2, a2):
         self.groups[g1].attendees[a1], self.groups[g2].attendees[a2] = self.groups[g2].attendees[a2], self.groups[g1].attendees[a1]
     
     def try_swap(self, g1, a1, g2, a2, cached_scores):
-        if g1 not in cached_scores:
-            cached_scores[g1] = {}
-        if a1 not in cached_scores[g1]:
-            cached_scores[g1][a1] = {}
-        if g2 not in cached_scores[g1][a1]:
-            cached_scores[g1][a1][g2] = {}
-        if a2 in cached_scores[g1][a1][g2]:
-            return cached_scores[g1][a1][g2][a2], cached_scores
-
-        test_conference = Conference.from_dict(self.__dict__())
-        test_conference.swap(g1, a1, g2, a2)
-        cached_scores[g1][a1][g2][a2] = test_conference.score() - self.score()
-
-        return cached_scores[g1][a1][g2][a2], cached_scores
-
-    def get_best_swap(self, good_enough=100, cached_scores=None):
+        """Score change from one swap, memoized in the flat ``cached_scores`` dict keyed by (g1, a1, g2, a2)"""
+        key = (g1, a1, g2, a2)
+        if key not in cached_scores:
+            index_matrix = self.index_matrix()
+            delta = self.swap_delta(index_matrix, self.group_scores(index_matrix),
+                                    np.array([g1]), np.array([a1]), np.array([g2]), np.array([a2]))
+            cached_scores[key] = float(delta[0])
+        return cached_scores[key], cached_scores
+
+    def swap_delta(self, index_matrix, group_scores, g1, a1, g2, a2) -> np.ndarray:
+        """
+        Change in conference score from swapping attendee a1 of group g1 with attendee a2 of group g2,
+        vectorized over arrays of swaps.  Only the two affected groups are rescored; nothing is copied
+        except their rows of the index matrix.
+        """
+        rows = np.arange(len(g1))
+        new_g1 = index_matrix[g1]
+        new_g1[rows, a1] = index_matrix[g2, a2]
+        new_g2 = index_matrix[g2]
+        new_g2[rows, a2] = index_matrix[g1, a1]
+        with self.stats.timer('scoring'):
+            new_score1, new_score2 = self.engine.score_batch(new_g1), self.engine.score_batch(new_g2)
+        return self._score_change(group_scores, g1, g2, new_score1, new_score2)
+
+    @staticmethod
+    def _score_change(group_scores, g1, g2, new_score1, new_score2) -> np.ndarray:
+        """
+        Change in conference score when groups g1 and g2 are rescored to new_score1 and new_score2.  g2 and
+        new_score2 may also be (count, k) matrices, for moves that touch k groups besides g1.
+        """
+        touched = np.column_stack([g1, g2])
+        new_scores = np.column_stack([new_score1, new_score2])
+        change = MEAN_WEIGHT * (new_scores - group_scores[touched]).sum(axis=1) / len(group_scores)
+        if MIN_WEIGHT:
+            # The lowest score among the untouched groups is one of the k + 1 lowest overall
+            width = touched.shape[1] + 1
+            lowest = np.append(np.argsort(group_scores)[:width], np.full(width, -1))[:width]
+            padded = np.append(group_scores, np.inf)
+            min_other = np.full(len(touched), np.inf)
+            for candidate in lowest[::-1]:
+                untouched = (touched != candidate).all(axis=1)
+                min_other = np.where(untouched, padded[candidate], min_other)
+            new_min = np.minimum(min_other, new_scores.min(axis=1))
+            change = change + MIN_WEIGHT * (new_min - min(group_scores))
+        return change
+
+    def swap_deltas(self):
+        """
+        Score change of every swap between two different groups, in (g1, a1, g2, a2) scan order.
+        Returns the g1, a1, g2, a2 and delta arrays.
+        """
+        index_matrix = self.index_matrix()
+        slot_g, slot_a = np.nonzero(index_matrix != self.engine.table.pad)
+        p, q = np.nonzero(slot_g[:, None] < slot_g[None, :])
+        g1, a1, g2, a2 = slot_g[p], slot_a[p], slot_g[q], slot_a[q]
+        return g1, a1, g2, a2, self.swap_delta(index_matrix, self.group_scores(index_matrix), g1, a1, g2, a2)
+
+    def get_best_swap(self, good_enough=100, cached_scores=None, neighborhood: SwapNeighborhood | None = None):
+        """
+        Find the best swap, or the first one in scan order that beats ``good_enough``.  All swaps are scored
+        in one vectorized pass, so ``cached_scores`` is only passed through for callers that keep it.  With a
+        SwapNeighborhood, only its candidate swaps are considered, in its mode, reusing its cached deltas.
+        """
         if cached_scores is None:
             cached_scores = {}
-        best_g1 = 0
-        best_a1 = 0
-        best_g2 = 0
-        best_a2 = 0
-        best_score = 0
-
-        for g1 in range(len(self.groups)):
-            for a1 in range(len(self.groups[g1].attendees)):
-                for g2 in range(len(self.groups)):
-                    if g2 <= g1:
-                        continue
-                    for a2 in range(len(self.groups[g2].attendees)):
-                        score, cached_scores = self.try_swap(g1, a1, g2, a2, cached_scores)
-                        if score > best_score:
-                            best_g1 = g1
-                            best_a1 = a1
-                            best_g2 = g2
-                            best_a2 = a2
-                            best_score = score
-                        if best_score > good_enough:
-                            return best_g1, best_a1, best_g2, best_a2, best_score, cached_scores
-        return best_g1, best_a1, best_g2, best_a2, best_score, cached_scores
+        if neighborhood is not None:
+            found = neighborhood.search(self, good_enough=max(good_enough, 0), reuse=not MIN_WEIGHT)
+            if found is None or found[4] <= 0:
+                return 0, 0, 0, 0, 0, cached_scores
+            return (*found, cached_scores)
+
+        g1, a1, g2, a2, deltas = self.swap_deltas()
+        self.stats.count('moves_tried', len(deltas))
+        if not len(deltas):
+            return 0, 0, 0, 0, 0, cached_scores
+
+        good = np.flatnonzero(deltas > max(good_enough, 0))
+        best = good[0] if len(good) else int(np.argmax(deltas))
+        if deltas[best] <= 0:
+            return 0, 0, 0, 0, 0, cached_scores
+        return int(g1[best]), int(a1[best]), int(g2[best]), int(a2[best]), float(deltas[best]), cached_scores
 
     @staticmethod
     def update_cached_scores(cached_scores, swapped_g1, swapped_g2):
-        if swapped_g1 in cached_scores:
-            cached_scores[swapped_g1] = {}
-        if swapped_g2 in cached_scores:
-            cached_scores[swapped_g2] = {}
-        for g in cached_scores:
-            for a in cached_scores[g]:
-                if swapped_g1 in cached_scores[g][a]:
-                    cached_scores[g][a][swapped_g1] = {}
-                if swapped_g2 in cached_scores[g][a]:
-                    cached_scores[g][a][swapped_g2] = {}
-
-    def improve_by_swap(self, i, best_score, cached_scores):
+        """Drop the try_swap deltas that involve either swapped group"""
+        swapped = (swapped_g1, swapped_g2)
+        for key in [key for key in cached_scores if key[0] in swapped or key[2] in swapped]:
+            del cached_scores[key]
+
+    def improve_by_swap(self, i, best_score, cached_scores, neighborhood: SwapNeighborhood | None = None):
         best_g1, best_a1, best_g2, best_a2, best_score, cached_scores = self.get_best_swap(good_enough=best_score,
-                                                                                               cached_scores=cached_scores)
+                                                                                               cached_scores=cached_scores,
+                                                                                               neighborhood=neighborhood)
         if best_score > 0:
             logging.debug(f"Swapping {best_g1}/{best_a1} ({self.groups[best_g1].attendees[best_a1].name}) " + \
                         f"with {best_g2}/{best_a2} ({self.groups[best_g2].attendees[best_a2].name}), +{best_score}")
             self.swap(best_g1, best_a1, best_g2, best_a2)
+            self.stats.count('moves_accepted')
             self.update_cached_scores(cached_scores, best_g1, best_g2)
             logging.debug(f'Score is {self.score()} after {i+1} swaps')
             return True, cached_scores
@@ -127,62 +350,373 @@ class Conference:
     def pulp_to_group(pulp_group, attendees: list[Attendee]):
         pass
 
-    def improve_by_pulp(self, i, best_score, cached_scores):
-        max_groups = 3
+    def _score_groups(self, groups: list[Group]) -> float:
+        """Conference score of an arbitrary list of groups over this roster, without building a Conference"""
+        index_matrix = self.engine.table.index_matrix([self.registry.ids_of(g.attendees) for g in groups])
+        return self._conference_score(self.engine.score_batch(index_matrix, use_cache=True))
 
-        start = i%(len(self.groups)+1-max_groups)
-        groups_to_dissolve = list(range(start, start+max_groups))
+    def _window(self, groups_to_dissolve):
+        """The groups dissolved by a window and the solve_subset arguments for them"""
+        groups_to_dissolve = list(groups_to_dissolve)
+        max_groups = len(groups_to_dissolve)
         max_group_size = max([len(self.groups[ig].attendees) for ig in groups_to_dissolve])
         min_group_size = min([len(self.groups[ig].attendees) for ig in groups_to_dissolve])
         subset = [a for i_group in groups_to_dissolve for a in self.groups[i_group].attendees]
+        initial_groups = [self.groups[ig].attendees for ig in groups_to_dissolve]
+        return groups_to_dissolve, (subset, max_group_size, min_group_size, max_groups, initial_groups)
 
-        pre_score = self.score()
-        found_groups = solve_subset(subset, max_group_size, min_group_size, max_groups)
-        if not found_groups or not found_groups[0]:
-            return False, cached_scores
-        
-        test_conference = Conference.from_dict(self.__dict__(), self.json_file)
+    def _replace_window(self, groups, groups_to_dissolve, subset, found_groups):
+        """``groups`` with the dissolved ones replaced by the solver's groups, or None if the solve failed"""
+        if not found_groups or not found_groups[0] or len(found_groups) != len(groups_to_dissolve):
+            return None
+        subset_registry = AttendeeRegistry(subset)
+        new_groups = list(groups)
         for idx, i_group in enumerate(groups_to_dissolve):
-            new_group = pulp_to_group(found_groups[idx], subset)
-            test_conference.groups[i_group] = new_group
-        post_score = test_conference.score()
-        
-        if post_score > pre_score:
-            self.groups = sorted(test_conference.groups, key=lambda g: np.mean([a.age for a in g.attendees]))
+            new_groups[i_group] = pulp_to_group(found_groups[idx], subset_registry)
+        return new_groups
+
+    def update_roster(self, added: list[Attendee] = (), dropped: list[str] = (), neighbors=UPDATE_NEIGHBORS,
+                      solver_mode='column_generation', time_limit=None, solver_options=None) -> list[list[str]]:
+        """
+        Apply late registrations (``added``) and drop-outs (``dropped`` names) to the current groups.  Each
+        new attendee joins the group closest to them in mean age; then only the changed groups and up to
+        ``neighbors`` groups either side of each, in age order, are re-solved with solve_subset, so every
+        other group stays exactly as published.  A window's solution replaces the greedy placement only if the
+        conference then scores strictly better; each solve is warm-started from it.  Returns the names in each
+        group whose membership changed.
+        """
+        dropped = set(dropped)
+        unknown = dropped.difference(self.registry.id_of)
+        if unknown:
+            raise ValueError(f"Cannot drop attendees who are not registered: {sorted(unknown)}")
+        duplicates = {a.name for a in added if a.name in self.registry and a.name not in dropped}
+        if duplicates:
+            raise ValueError(f"Attendees are already registered: {sorted(duplicates)}")
+
+        previous_keys = self._group_keys()
+        groups = [Group([a for a in g.attendees if a.name not in dropped]) for g in self.groups]
+        touched = {id(new) for new, old in zip(groups, self.groups) if len(new.attendees) != len(old.attendees)}
+        groups = [g for g in groups if g.attendees] or [Group([])]
+        for attendee in added:
+            target = min(groups, key=lambda g: (abs(np.mean([a.age for a in g.attendees] or [attendee.age])
+                                                    - attendee.age), len(g.attendees)))
+            target.attendees.append(attendee)
+            touched.add(id(target))
+        groups = [g for g in groups if g.attendees]
+
+        self.groups = sorted(groups, key=lambda g: np.mean([a.age for a in g.attendees]))
+        self.registry = AttendeeRegistry(self._flatten_groups(self.groups))
+        self.engine = make_engine(self.registry)
+
+        # Each window starts CBC from the greedy placement, and only a strictly better answer replaces it
+        solver_options = {'warm_start': True, **(solver_options or {})}
+        changed = [i for i, g in enumerate(self.groups) if id(g) in touched]
+        # One small window per changed group, solved in turn, so the work and the churn stay local however
+        # many groups the update touches
+        runs = [list(range(max(0, i - neighbors), min(len(self.groups), i + neighbors + 1))) for i in changed]
+        for run in runs:
+            subset = [a for i in run for a in self.groups[i].attendees]
+            sizes = [len(self.groups[i].attendees) for i in run]
+            max_group_size = max(max(sizes), -(-len(subset) // len(run)))
+            min_group_size = min(min(sizes), len(subset) // len(run))
+            found_groups = solve_subset(subset, max_group_size, min_group_size, len(run), mode=solver_mode,
+                                        initial_groups=[self.groups[i].attendees for i in run], stats=self.stats,
+                                        time_limit=time_limit, solver_options=solver_options)
+            new_groups = self._replace_window(self.groups, run, subset, found_groups)
+            if new_groups is None:
+                logging.warning(f"Could not re-solve groups {run} after the roster update; "
+                                f"keeping the greedy placement")
+                continue
+            if self._score_groups(new_groups) > self._score_groups(self.groups):
+                self.groups = new_groups
+        self.groups = sorted(self.groups, key=lambda g: np.mean([a.age for a in g.attendees]))
+
+        changed_groups = self.changed_groups(previous_keys)
+        logging.info(f"Roster update (+{len(added)}, -{len(dropped)}) re-solved {len(runs)} windows; "
+                     f"{len(changed_groups)} of {len(self.groups)} groups changed")
+        return changed_groups
+
+    def improve_by_pulp(self, i, best_score, cached_scores, window_size=WINDOW_SIZE, solver_mode='enumerate',
+                        time_limit=None, solver_options=None, candidate_cache_dir=None):
+        """
+        Dissolve the ``window_size`` groups the window scheduler ranks most promising and re-partition them
+        with solve_subset.  Use solver_mode='column_generation' for windows too large to enumerate.
+        ``time_limit`` bounds each CBC call, and ``solver_options`` and ``candidate_cache_dir`` (its
+        ``cache_dir``) go to solve_subset.
+        """
+        max_groups = min(window_size, len(self.groups))
+        group_keys = self._group_key_list()
+        index_matrix = self.index_matrix()
+        windows = self.window_scheduler.next_windows(group_keys, self.group_scores(index_matrix),
+                                                     self.buddyless_counts(index_matrix), max_groups)
+        if not windows:
+            logging.debug("Every window is already locally optimal")
+            return False, cached_scores
+        groups_to_dissolve, (subset, max_group_size, min_group_size, max_groups, initial_groups) = self._window(windows[0])
+
+        pre_score = self.score()
+        start_time = time.monotonic()
+        found_groups = solve_subset(subset, max_group_size, min_group_size, max_groups, mode=solver_mode,
+                                    initial_groups=initial_groups, cache_dir=candidate_cache_dir, stats=self.stats,
+                                    time_limit=time_limit, solver_options=solver_options)
+        self.stats.count('moves_tried')
+        new_groups = self._replace_window(self.groups, groups_to_dissolve, subset, found_groups)
+        if new_groups is not None and self._score_groups(new_groups) > pre_score:
+            self.groups = sorted(new_groups, key=lambda g: np.mean([a.age for a in g.attendees]))
+            self.stats.count('moves_accepted')
             return True, cached_scores
 
+        self._mark_window_solved(group_keys, groups_to_dissolve, time.monotonic() - start_time, time_limit,
+                                 solver_options)
+        return False, cached_scores
+
+    def _mark_window_solved(self, group_keys, groups_to_dissolve, seconds, time_limit, solver_options=None):
+        # A solve cut short by its time limit, or stopped within a gap of the bound, has not proven the window
+        # can't be improved
+        if (time_limit is None or seconds < time_limit) and not (solver_options or {}).get('gap_rel'):
+            self.window_scheduler.mark_solved(group_keys, groups_to_dissolve)
+
+    def improve_by_parallel_pulp(self, pool, rng, workers, cached_scores, window_size=WINDOW_SIZE,
+                                 solver_mode='enumerate', time_limit=None, solver_options=None,
+                                 candidate_cache_dir=None):
+        """
+        Re-optimize several non-overlapping windows at once in ``pool``: the most promising ones by the
+        window scheduler, with ties broken by ``rng``.  Every window that still improves the conference is
+        merged back, in window order, so the result only depends on the seed and ``workers``.
+        """
+        max_groups = min(window_size, len(self.groups))
+        num_windows = max(1, min(workers, len(self.groups) // max_groups))
+        group_keys = self._group_key_list()
+        index_matrix = self.index_matrix()
+        windows = [self._window(window) for window in
+                   self.window_scheduler.next_windows(group_keys, self.group_scores(index_matrix),
+                                                      self.buddyless_counts(index_matrix), max_groups,
+                                                      count=num_windows, rng=rng)]
+        if not windows:
+            logging.debug("Every window is already locally optimal")
+            return False, cached_scores
+
+        futures = [pool.submit(_solve_window, [self.groups[ig].attendees for ig in groups_to_dissolve],
+                               max_group_size, min_group_size, max_groups, solver_mode, self.stats.enabled,
+                               time_limit, solver_options, candidate_cache_dir)
+                   for groups_to_dissolve, (_, max_group_size, min_group_size, max_groups, _) in windows]
+
+        groups = self.groups
+        score = self.score()
+        improved = False
+        for (groups_to_dissolve, args), future in zip(windows, futures):
+            found_groups, worker_stats, seconds = future.result()
+            self.stats.merge(worker_stats)
+            self.stats.count('moves_tried')
+            new_groups = self._replace_window(groups, groups_to_dissolve, args[0], found_groups)
+            new_score = None if new_groups is None else self._score_groups(new_groups)
+            if new_score is not None and new_score > score:
+                groups, score, improved = new_groups, new_score, True
+                self.stats.count('moves_accepted')
+            else:
+                self._mark_window_solved(group_keys, groups_to_dissolve, seconds, time_limit, solver_options)
+
+        if improved:
+            self.groups = sorted(groups, key=lambda g: np.mean([a.age for a in g.attendees]))
+        return improved, cached_scores
+
+    def groups_from_index_matrix(self, index_matrix) -> list[Group]:
+        pad = self.engine.table.pad
+        return [Group(self.registry.attendees_for(row[row != pad])) for row in index_matrix]
+
+    def improve_by_local_search(self, local_search: LocalSearch, cached_scores, time_limit=None):
+        """
+        Run one budget of ``local_search`` from the current groups and keep the best conference it finds.
+        ``time_limit`` caps the strategy's own time limit for this run.
+        """
+        pre_score = self.score()
+        own_limit = local_search.time_limit
+        if time_limit is not None:
+            local_search.time_limit = time_limit if own_limit is None else min(own_limit, time_limit)
+        try:
+            with self.stats.timer('local_search'):
+                best_matrix, best_score = local_search.run(self.engine, self.index_matrix(),
+                                                           self._conference_score, self._score_change)
+        finally:
+            local_search.time_limit = own_limit
+        self.stats.count('moves_tried', local_search.moves_tried)
+        self.stats.count('moves_accepted', local_search.moves_accepted)
+        logging.debug(f"{type(local_search).__name__}: {local_search.moves_tried} moves tried, "
+                      f"{local_search.moves_accepted} accepted")
+        if best_score > pre_score:
+            groups = self.groups_from_index_matrix(best_matrix)
+            self.groups = sorted(groups, key=lambda g: np.mean([a.age for a in g.attendees]))
+            return True, cached_scores
         return False, cached_scores
 
-    def try_to_improve(self, i, best_score, cached_scores):
+    def try_to_improve(self, i, best_score, cached_scores, window_size=WINDOW_SIZE, solver_mode='enumerate',
+                       pool=None, rng=None, workers=1, local_search=None, time_limit=None, solver_options=None,
+                       candidate_cache_dir=None):
         """
-        Do "one" thing to try to make the conference better
+        Do "one" thing to try to make the conference better, spending at most about ``time_limit`` seconds
+        in any one solver call
         """
-        return self.improve_by_pulp(i, best_score, cached_scores)
+        if local_search is not None:
+            return self.improve_by_local_search(local_search, cached_scores, time_limit=time_limit)
+        if pool is not None:
+            return self.improve_by_parallel_pulp(pool, rng, workers, cached_scores, window_size=window_size,
+                                                 solver_mode=solver_mode, time_limit=time_limit,
+                                                 solver_options=solver_options,
+                                                 candidate_cache_dir=candidate_cache_dir)
+        return self.improve_by_pulp(i, best_score, cached_scores, window_size=window_size, solver_mode=solver_mode,
+                                    time_limit=time_limit, solver_options=solver_options,
+                                    candidate_cache_dir=candidate_cache_dir)
 
-    def optimize(self, max_failed_tries=MAX_FAILED_TRIES):
+    def optimize(self, max_failed_tries=MAX_FAILED_TRIES, window_size=WINDOW_SIZE, solver_mode='enumerate',
+                 workers=1, seed=None, local_search=None, snapshot_interval=SNAPSHOT_INTERVAL,
+                 snapshot_moves=SNAPSHOT_MOVES, stats: RunStats | None = None, time_limit=None,
+                 solve_time_limit=None, plateau_tries=None, plateau_tolerance=PLATEAU_TOLERANCE,
+                 solver_options=None, gap_tolerance=None, bound_time_limit=None, candidate_cache_dir=None) -> float:
         """
-        Trying swapping two youth. If it increases the score, keep the swap and try again, up to 100 times
+        Repeatedly re-optimize windows of groups, keeping every improvement, until ``max_failed_tries``
+        attempts have failed.  With workers > 1, each attempt solves several non-overlapping windows in a process pool;
+        the windows are drawn from ``seed``, so a given seed and worker count always give the same result.
+        Pass a LocalSearch strategy (SimulatedAnnealing, TabuSearch, neighborhoods.ExchangeSearch, or
+        ga_approach.GeneticAlgorithm) as ``local_search`` to improve with it instead of CBC.
+
+        Each accepted move is appended to a journal beside the JSON file, and a full snapshot is written every
+        ``snapshot_interval`` seconds or ``snapshot_moves`` moves and on exit; Conference.resume recovers both.
+
+        Pass a RunStats as ``stats`` to collect per-phase timings and counters for the run; without one,
+        instrumentation is a no-op.
+
+        For an anytime run, ``time_limit`` stops the search once that many seconds have passed, and
+        ``plateau_tries`` stops it once that many tries in a row have gained less than ``plateau_tolerance``.
+        Each CBC call (or local-search run) is bounded by ``solve_time_limit`` and by the time left.  The best
+        conference found is kept however the run ends, and its score is returned.
+
+        ``solver_options`` tune every CBC solve (see pulp_approach.SOLVER_OPTIONS), e.g.
+        ``{'gap_rel': 0.01, 'threads': 2, 'warm_start': True}`` to start each window from its current groups.
+
+        With ``gap_tolerance``, an upper bound on the score is computed first (see bound; ``bound_time_limit``
+        caps the time spent on it), every new best score is logged with its optimality gap, and the search
+        stops once the gap is at most ``gap_tolerance`` (e.g. 0.05 for 5%).
+
+        Pass ``candidate_cache_dir`` (e.g. candidate_cache.CANDIDATE_CACHE_DIR) to reuse enumerated windows'
+        candidates across runs from .npz files in that directory; by default nothing is written to disk.
         """
+        journal = MoveJournal.for_snapshot(self.json_file)
+        self.stats = stats if stats is not None else NULL_STATS
+        try:
+            bound = None
+            if gap_tolerance is not None:
+                bound = self.bound(time_limit=bound_time_limit)
+                logging.info(f"Upper bound {bound}, gap {self.optimality_gap(self.score(), bound):.2%}")
+            options = dict(journal=journal, snapshot_interval=snapshot_interval, snapshot_moves=snapshot_moves,
+                           time_limit=time_limit, solve_time_limit=solve_time_limit, plateau_tries=plateau_tries,
+                           plateau_tolerance=plateau_tolerance, solver_options=solver_options, bound=bound,
+                           gap_tolerance=gap_tolerance, candidate_cache_dir=candidate_cache_dir)
+            if workers > 1 and local_search is None:
+                with ProcessPoolExecutor(max_workers=workers) as pool:
+                    return self._optimize(max_failed_tries, window_size, solver_mode, pool, random.Random(seed),
+                                          workers, **options)
+            else:
+                return self._optimize(max_failed_tries, window_size, solver_mode, local_search=local_search,
+                                      **options)
+        finally:
+            journal.close()
+            if self.stats.enabled:
+                logging.info(f"Run stats: {self.stats.summary()}")
+            self.stats = NULL_STATS
+
+    def checkpoint(self, journal: MoveJournal):
+        """Snapshot the conference, then drop the journaled moves the snapshot now contains"""
+        self.save()
+        journal.clear()
+
+    @staticmethod
+    def _solve_budget(solve_time_limit, remaining):
+        if remaining is None:
+            return solve_time_limit
+        return remaining if solve_time_limit is None else min(solve_time_limit, remaining)
+
+    def _optimize(self, max_failed_tries, window_size, solver_mode, pool=None, rng=None, workers=1,
+                  local_search=None, journal=None, snapshot_interval=SNAPSHOT_INTERVAL, snapshot_moves=SNAPSHOT_MOVES,
+                  time_limit=None, solve_time_limit=None, plateau_tries=None, plateau_tolerance=PLATEAU_TOLERANCE,
+                  solver_options=None, bound=None, gap_tolerance=None, candidate_cache_dir=None):
+        if journal is None:
+            journal = MoveJournal.for_snapshot(self.json_file)
+        deadline = None if time_limit is None else time.monotonic() + time_limit
+        last_snapshot = time.monotonic()
+        unsaved_moves = 0
         cached_scores = None
         best_score = 2000
+        best_conference_score = self.score()
+        best_groups = [list(g.attendees) for g in self.groups]
+        # Best score before each of the last plateau_tries tries
+        recent_best = deque(maxlen=plateau_tries + 1) if plateau_tries else None
         last_time = datetime.datetime.now()
         num_failed_tries = 0
         i = 0
-        while num_failed_tries < MAX_FAILED_TRIES:
-            if (datetime.datetime.now() - last_time).seconds > 60:
-                last_time = datetime.datetime.now()
-                logging.info(f"Try {i+1} score={self.score()}")
-            
-            improved, cached_scores = self.try_to_improve(i, best_score, cached_scores)
-            i += 1
-            if not improved:
-                logging.info(f"Failed to improve after {i} tries")
-                num_failed_tries += 1
-                # return
-            else:
-                logging.info(f"New score after {i+1} tries: {self.score()}.  Saving conference to {self.json_file}")
-                with open(self.json_file, 'w') as f:
-                    json.dump(self.__dict__(), f)
+        try:
+            while num_failed_tries < max_failed_tries:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    logging.info(f"Time limit of {time_limit}s reached after {i} tries")
+                    break
+                if bound is not None and self.optimality_gap(best_conference_score, bound) <= gap_tolerance:
+                    logging.info(f"Gap {self.optimality_gap(best_conference_score, bound):.2%} is within "
+                                 f"{gap_tolerance:.2%}, stopping after {i} tries")
+                    break
+                if recent_best is not None:
+                    recent_best.append(best_conference_score)
+                    if len(recent_best) == recent_best.maxlen and recent_best[-1] - recent_best[0] < plateau_tolerance:
+                        logging.info(f"Score has plateaued over the last {plateau_tries} tries, stopping after {i}")
+                        break
+                if (datetime.datetime.now() - last_time).seconds > 60:
+                    last_time = datetime.datetime.now()
+                    logging.info(f"Try {i+1} score={best_conference_score}")
+
+                previous_keys = self._group_keys()
+                with self.stats.timer('try'):
+                    improved, cached_scores = self.try_to_improve(i, best_score, cached_scores,
+                                                                  window_size=window_size, solver_mode=solver_mode,
+                                                                  pool=pool, rng=rng, workers=workers,
+                                                                  local_search=local_search,
+                                                                  solver_options=solver_options,
+                                                                  candidate_cache_dir=candidate_cache_dir,
+                                                                  time_limit=self._solve_budget(solve_time_limit,
+                                                                                                remaining))
+                self.stats.count('improvements' if improved else 'failed_tries')
+                i += 1
+                if improved:
+                    score = self.score()
+                    if score > best_conference_score:
+                        best_conference_score = score
+                        best_groups = [list(g.attendees) for g in self.groups]
+                    else:
+                        # Only the best conference is ever kept (and journaled)
+                        self.groups = [Group(list(attendees)) for attendees in best_groups]
+                        improved = False
+                if not improved:
+                    logging.info(f"Failed to improve after {i} tries")
+                    num_failed_tries += 1
+                    # return
+                else:
+                    gap = '' if bound is None else f", gap {self.optimality_gap(best_conference_score, bound):.2%}"
+                    logging.info(f"New score after {i+1} tries: {best_conference_score}{gap}")
+                    self.move_sequence += 1
+                    journal.append(self.changed_groups(previous_keys), self.move_sequence)
+                    unsaved_moves += 1
+                    if unsaved_moves >= snapshot_moves or time.monotonic() - last_snapshot >= snapshot_interval:
+                        logging.info(f"Saving conference to {self.json_file}")
+                        with self.stats.timer('snapshot'):
+                            self.checkpoint(journal)
+                        last_snapshot = time.monotonic()
+                        unsaved_moves = 0
+        finally:
+            # Whatever stopped the run, leave the conference at the best groups found
+            if self._group_keys() != {frozenset(a.name for a in g) for g in best_groups}:
+                self.groups = [Group(list(attendees)) for attendees in best_groups]
+            if unsaved_moves:
+                self.checkpoint(journal)
+        logging.debug(f"Group score cache: {self.engine.cache}")
+        return best_conference_score
     
     def show(self, show_groups=True):
         bless = 0
@@ -0,0 +1,142 @@
+import argparse
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from attendee import Attendee
+from common import from_csv
+from conference import Conference
+from group import Group
+from main import make_groups
+from scoring_config import SCORING_CONFIG
+
+DECOMPOSE_DIR = os.path.join('results', 'decompose')
+
+
+def independent_partitions(attendees: list[Attendee], by_gender=True, max_age_range=SCORING_CONFIG.max_age_range,
+                           required_groupings=SCORING_CONFIG.required_groupings) -> list[list[Attendee]]:
+    """
+    Split the roster into parts that no group needs to span: one per gender (if ``by_gender``), each cut
+    further wherever consecutive ages are more than ``max_age_range`` apart, since no group passing the
+    solver's screen can cross such a gap.  Parts that share a required grouping are merged back together.
+    Each part is sorted by age.
+    """
+    attendees = sorted(attendees, key=lambda a: a.age)
+    label = {}
+    for female in ([False, True] if by_gender else [None]):
+        members = [a for a in attendees if female is None or a.is_female == female]
+        band = 0
+        for prev, a in zip([None] + members[:-1], members):
+            if prev is not None and a.age - prev.age > max_age_range:
+                band += 1
+            label[a.name] = (female, band)
+
+    parent = {key: key for key in label.values()}
+
+    def root(key):
+        while parent[key] != key:
+            key = parent[key]
+        return key
+
+    for rg in required_groupings:
+        keys = [label[name] for name in rg if name in label]
+        for key in keys[1:]:
+            parent[root(key)] = root(keys[0])
+
+    parts = {}
+    for a in attendees:
+        parts.setdefault(root(label[a.name]), []).append(a)
+    return sorted(parts.values(), key=lambda part: (part[0].is_female, part[0].age))
+
+
+def allocate_groups(part_sizes: list[int], num_groups) -> list[int]:
+    """Share ``num_groups`` among parts in proportion to their size (largest remainder), at least one each"""
+    if num_groups < len(part_sizes):
+        raise ValueError(f"Cannot give {len(part_sizes)} independent parts only {num_groups} groups")
+    shares = np.array(part_sizes, dtype=float) * num_groups / sum(part_sizes)
+    counts = np.maximum(np.floor(shares).astype(int), 1)
+    while counts.sum() < num_groups:
+        counts[np.argmax(shares - counts)] += 1
+    while counts.sum() > num_groups:
+        spare = np.flatnonzero(counts > 1)
+        counts[spare[np.argmin((shares - counts)[spare])]] -= 1
+    return counts.tolist()
+
+
+def starting_groups(attendees: list[Attendee], num_groups,
+                    required_groupings=SCORING_CONFIG.required_groupings) -> list[Group]:
+    """
+    Age-ordered groups of the sizes make_groups would use, except that the members of each required
+    grouping are kept together (placed with the youngest of them), so no part starts out violating a rule
+    """
+    attendees = sorted(attendees, key=lambda a: a.age)
+    block_of = {}
+    for rg in required_groupings:
+        members = [a for a in attendees if a.name in rg]
+        for a in members:
+            block_of[a.name] = members[0].name
+    blocks = {}
+    for a in attendees:
+        blocks.setdefault(block_of.get(a.name, a.name), []).append(a)
+
+    targets = np.cumsum([len(g.attendees) for g in make_groups(attendees, num_groups)])
+    groups = [[] for _ in range(num_groups)]
+    placed = 0
+    for block in blocks.values():
+        # The first group whose share of the age-ordered roster this block's start falls in
+        i = min(int(np.searchsorted(targets, placed, side='right')), num_groups - 1)
+        groups[i] += block
+        placed += len(block)
+    return [Group(g) for g in groups if g]
+
+
+def _optimize_part(attendees, num_groups, json_file, optimize_kwargs):
+    """Process-pool entry point: optimize one part from its starting_groups and return its groups"""
+    conference = Conference(starting_groups(attendees, num_groups), json_file)
+    score = conference.optimize(**optimize_kwargs)
+    logging.info(f"Part {json_file} ({len(attendees)} attendees, {num_groups} groups) finished with score {score}")
+    return conference.groups
+
+
+def optimize_decomposed(attendees: list[Attendee], num_groups, json_file, workers=None, by_gender=True,
+                        json_dir=DECOMPOSE_DIR, **optimize_kwargs) -> Conference:
+    """
+    Split the roster with independent_partitions, optimize every part in its own process with
+    Conference.optimize (``optimize_kwargs``, e.g. time_limit), and merge the parts' groups into one
+    conference saved to ``json_file``.  Each part journals to its own file in ``json_dir``.
+    """
+    parts = independent_partitions(attendees, by_gender=by_gender)
+    counts = allocate_groups([len(part) for part in parts], num_groups)
+    logging.info(f"Decomposed {len(attendees)} attendees into {len(parts)} parts: "
+                 + ', '.join(f"{len(part)} in {k} groups" for part, k in zip(parts, counts)))
+    os.makedirs(json_dir, exist_ok=True)
+    with ProcessPoolExecutor(max_workers=workers or len(parts)) as pool:
+        futures = [pool.submit(_optimize_part, part, k,
+                               os.path.join(json_dir, f'part_{p}.json'), optimize_kwargs)
+                   for p, (part, k) in enumerate(zip(parts, counts))]
+        results = [future.result() for future in futures]
+
+    conference = Conference([g for groups in results for g in groups], json_file)
+    conference.save()
+    logging.info(f"Merged {len(conference.groups)} groups with score {conference.score()} into {json_file}")
+    return conference
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s:%(levelname)s:%(message)s')
+    parser = argparse.ArgumentParser(description="Optimize independent parts of the roster in parallel and merge "
+                                                 "them into one conference")
+    parser.add_argument("--input", default='data/input.txt', help="Tab-separated roster")
+    parser.add_argument("--num_groups", type=int, default=22, help="Groups across the whole roster")
+    parser.add_argument("--workers", type=int, default=None, help="Processes to use (default: one per part)")
+    parser.add_argument("--time_limit", type=float, default=None, help="Seconds per part")
+    parser.add_argument("--solver_mode", default='enumerate')
+    parser.add_argument("--mixed_gender", action='store_true', help="Do not split the roster by gender")
+    parser.add_argument("--output", default='results/conference_decomposed.json',
+                        help="Path of the JSON file for the merged conference")
+    args = parser.parse_args()
+
+    conference = optimize_decomposed(from_csv(args.input), args.num_groups, args.output, workers=args.workers,
+                                     by_gender=not args.mixed_gender, time_limit=args.time_limit,
+                                     solver_mode=args.solver_mode)
+    conference.show(show_groups=False)
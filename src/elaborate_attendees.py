@@ -1,20 +1,18 @@
-from main import from_csv
+from registry import AttendeeRegistry
 
-attendees = from_csv('data/input.txt')
-attendee_names = [a.name for a in attendees]
+registry = AttendeeRegistry.from_csv('data/input.txt')
+friend_graph = registry.friend_graph
 
-for a in sorted(attendees, key=lambda a: (a.is_female, a.age)):
+for a in sorted(registry, key=lambda a: (a.is_female, a.age)):
     a_line = f"{a.name},{a.unit},{a.age},"
     for f in a.friends:
-        if f in attendee_names:
-            fai = attendee_names.index(f)
-            fa = attendees[fai]
+        if f in registry:
+            fa = registry.by_name(f)
             a_line += f"{fa.name} ({fa.age} {fa.unit[0:3]}{fa.unit[-3:]}),"
         else:
             a_line += ','
-    for a2 in attendees:
-        if a.name in a2.friends:
-
-            a_line += f"{a2.name}({3-a2.friends.count(None)}),"
+    # Someone who named this attendee twice is listed once
+    for i in sorted(set(friend_graph.in_of(registry.id_of[a.name]).tolist())):
+        a2 = registry.by_id(i)
+        a_line += f"{a2.name}({3-a2.friends.count(None)}),"
     print(a_line)
-    
\ No newline at end of file
@@ -0,0 +1,76 @@
+from functools import cached_property
+import numpy as np
+
+
+class FriendGraph:
+    """
+    The buddy graph of a roster, built once in CSR form.  Node i is the attendee with registry id i; the
+    buddies i named are ``out_indices[out_indptr[i]:out_indptr[i + 1]]`` and the attendees who named i are
+    ``in_indices[in_indptr[i]:in_indptr[i + 1]]``.  A buddy named twice is kept as two edges, so they still
+    count twice when scoring.  ``reciprocal[e]`` is True when the target of out-edge e named its source back,
+    and ``components`` labels the weakly connected components (computed on first use).
+    """
+    def __init__(self, friend_ids: list[tuple[int, ...]]):
+        self.size = len(friend_ids)
+        n = self.size
+        degrees = np.array([len(f) for f in friend_ids], dtype=np.int64)
+        self.out_indptr = np.concatenate([[0], np.cumsum(degrees)])
+        self.out_indices = np.array([j for f in friend_ids for j in f], dtype=np.int64)
+        self.sources = np.repeat(np.arange(n, dtype=np.int64), degrees)
+
+        by_target = np.argsort(self.out_indices, kind='stable')
+        self.in_indptr = np.concatenate([[0], np.cumsum(np.bincount(self.out_indices, minlength=n))])
+        self.in_indices = self.sources[by_target]
+
+        codes = self.sources * n + self.out_indices
+        self.reciprocal = np.isin(self.out_indices * n + self.sources, codes)
+
+        # Out-neighbors as a rectangle padded with -1, plus an all-padding row for a padded index matrix's pad
+        width = max(1, int(degrees.max(initial=0)))
+        self.out_matrix = np.full((n + 1, width), -1, dtype=np.int64)
+        self.out_matrix[self.sources, np.arange(len(self.sources)) - self.out_indptr[self.sources]] = self.out_indices
+
+    @cached_property
+    def components(self) -> np.ndarray:
+        # Spread the smallest id across every edge until nothing changes
+        labels = np.arange(self.size, dtype=np.int64)
+        while True:
+            before = labels.copy()
+            low = np.minimum(labels[self.sources], labels[self.out_indices])
+            np.minimum.at(labels, self.sources, low)
+            np.minimum.at(labels, self.out_indices, low)
+            labels = labels[labels]
+            if np.array_equal(labels, before):
+                break
+        return np.unique(labels, return_inverse=True)[1].reshape(-1)
+
+    def __len__(self):
+        return self.size
+
+    @property
+    def num_edges(self) -> int:
+        return len(self.out_indices)
+
+    @property
+    def num_components(self) -> int:
+        return int(self.components.max(initial=-1)) + 1
+
+    def out_of(self, i) -> np.ndarray:
+        """Ids of the buddies attendee ``i`` named"""
+        return self.out_indices[self.out_indptr[i]:self.out_indptr[i + 1]]
+
+    def in_of(self, i) -> np.ndarray:
+        """Ids of the attendees who named ``i`` as a buddy"""
+        return self.in_indices[self.in_indptr[i]:self.in_indptr[i + 1]]
+
+    def reciprocal_of(self, i) -> np.ndarray:
+        """For each buddy in out_of(i), whether they named ``i`` back"""
+        return self.reciprocal[self.out_indptr[i]:self.out_indptr[i + 1]]
+
+    def buddies_in_groups(self, idx: np.ndarray) -> np.ndarray:
+        """
+        For a padded index matrix of groups, how many of each member's buddy slots name someone in the same
+        group.  Padding ids (>= size) have no buddies and count 0.
+        """
+        neighbors = self.out_matrix[np.minimum(idx, self.size)]
+        return (neighbors[:, :, :, None] == idx[:, None, None, :]).any(axis=3).sum(axis=2, dtype=np.int64)
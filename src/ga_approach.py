@@ -1,55 +1,153 @@
-import random
+import logging
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
-from deap import base, creator, tools, algorithms
-
-# Sample data: friend lists for each youth (0-139)
-youth_list = ["YW1", "YW2", "YW3", "YW4", "YM1", "YM2", "YW5", "YM3", "YM4", "YM5", "YW6", "YW7", "YM6", "YM7", "YM8", "YM9", "YM10", "YM11", "YW8", "YM12", "YM13", "YM14", "YW9", "YM15", "YM16", "YM17", "YW10", "YW11", "YM18", "YM19", "YW12", "YM20", "YW13", "YW14", "YW15", "YM21", "YM22", "YM24", "YM25", "YM26", "YM27", "YW16", "YW17", "YM28", "YM29", "YW18", "YM30", "YM31", "YM32", "YM33", "YW19", "YW20", "YM34", "YM35", "YW21", "YM36", "YW22", "YW23", "YW24", "YM37", "YW25", "YW26", "YW27", "YW28", "YM38", "YW29", "YW30", "YW31", "YM39", "YM40", "YW32", "YW33", "YM41", "YW34", "YW35", "YW36", "YW38", "YW39", "YM42", "YM43", "YW40", "YW41", "YW42", "YM44", "YM45", "YM46", "YW43", "YW45", "YM48", "YW46", "YM49", "YW47", "YW48", "YW49", "YM50", "YW50", "YM51", "YW51", "YM52", "YM53", "YM54", "YW52", "YM55", "YW53", "YM56", "YW54", "YW55", "YM57", "YM58", "YM59", "YW56", "YW57", "YM60", "YM61", "YW58", "YM62", "YW59", "YW60", "YM63", "YW61", "YW62", "YM64", "YW63", "YM65", "YM66", "YM67", "YW68", "YM69", "YM70", "YM71", "YM72", "YW69", "YM73", "YM74", "YM75", "YM76", "YM77", "YM78", "YW70", "YM79", "YW71"]
-friend_lists = [...]  # Replace with your actual data
-
-# Constants
-NUM_GROUPS = 10
-MAX_AGE_DIFF = 18 * 12  # Maximum acceptable age difference in months
-
-def eval_fitness(individual):
-    groups = [individual[i:i + NUM_GROUPS] for i in range(0, len(individual), NUM_GROUPS)]
-    friend_pairs_count = sum(sum(g == f) for g in groups for f in friend_lists[y]) for y in range(140))
-    age_range_penalty = sum(max(abs(y.age - x.age)) - MAX_AGE_DIFF, 0)
-                            for y in individuals for x in groups[individual.index(y)])
-    return friend_pairs_count, age_range_penalty
-
-creator.create("FitnessMax", base.Fitness, weights=(1.0, -1.0))
-creator.create("Individual", list, fitness=creator.FitnessMax)
-
-toolbox = base.Toolbox()
-toolbox.register("indices", random.sample, range(140), NUM_GROUPS)
-toolbox.register("individual", tools.initRepeat, creator.Individual, toolbox.indices, n=NUM_GROUPS)
-toolbox.register("population", tools.initRepeat, list, toolbox.individual)
-
-def cxTwoPoint(x):
-    """Ordered crossover for grouped individuals"""
-    if random.random() < 0.5:
-        return x
-    else:
-        return toolbox.clone(x)
-
-toolbox.register("evaluate", eval_fitness)
-toolbox.register("mate", cxTwoPoint)
-toolbox.register("mutate", tools.mutationOrdered, indpb=0.1)
-toolbox.register("select", tools.selTournament, tournsize=3)
-
-population = toolbox.population(n=300)
-hof = tools.HallOfFame(1)
-
-stats_fit = tools.Statistics(lambda ind: ind.fitness.values)
-stats_size = tools.Statistics(lambda ind: len(ind))
-mstats = tools.MultiStatistics([stats_fit, stats_size])
-mstats.register("avg", numpy.mean)
-mstats.register("size", lambda ind: len(ind))
-
-population, logbook = algorithms.eaSimple(population, toolbox, cxpb=0.8, mutpb=0.2,
-                                           ngen=50, stats=mstats, halloffame=hof, verbose=True)
-
-# Print best individual and its fitness value
-best_ind = hof[0]
-print(f"Best individual: {best_ind}")
-print(f"Fitness: {eval_fitness(best_ind)}")
+from local_search import LocalSearch
+from scoring import ScoringEngine
+
+POPULATION_SIZE = 64
+ELITE = 2
+TOURNAMENT_SIZE = 3
+CROSSOVER_RATE = 0.8
+MUTATION_RATE = 0.3
+MUTATION_SWAPS = 2
+
+_worker_engine = None
+
+
+def _init_worker(engine: ScoringEngine):
+    global _worker_engine
+    _worker_engine = engine
+
+
+def _score_rows(index_matrix):
+    return _worker_engine.score_batch(index_matrix)
+
+
+class GeneticAlgorithm(LocalSearch):
+    """
+    Genetic algorithm over group assignments.  An individual is an integer array giving each attendee's group;
+    every individual keeps the starting group sizes, so crossover and mutation never make a group too big or
+    too small.  Each generation's whole population is turned into one padded index matrix and scored by the
+    same engine as Group.score in a single batch, optionally split across ``workers`` processes.
+
+    The population is seeded from the starting conference plus mutated copies of it.  ``iterations`` counts
+    individuals evaluated.
+    """
+    def __init__(self, population_size=POPULATION_SIZE, elite=ELITE, tournament_size=TOURNAMENT_SIZE,
+                 crossover_rate=CROSSOVER_RATE, mutation_rate=MUTATION_RATE, mutation_swaps=MUTATION_SWAPS,
+                 workers=1, iterations=200_000, **kwargs):
+        super().__init__(iterations=iterations, **kwargs)
+        self.population_size = population_size
+        self.elite = elite
+        self.tournament_size = tournament_size
+        self.crossover_rate = crossover_rate
+        self.mutation_rate = mutation_rate
+        self.mutation_swaps = mutation_swaps
+        self.workers = workers
+
+    def _layout(self, engine, index_matrix):
+        """Attendee ids, starting assignment, and where each sorted position lands in the padded matrix"""
+        self.pad = engine.table.pad
+        groups, slots = np.nonzero(index_matrix != self.pad)
+        self.attendees = index_matrix[groups, slots]
+        self.sizes = np.bincount(groups, minlength=len(index_matrix))
+        self.width = index_matrix.shape[1]
+        # Once an individual's attendees are sorted by group, position t belongs in row group_at[t], column slot_at[t]
+        self.group_at = np.repeat(np.arange(len(self.sizes)), self.sizes)
+        self.slot_at = np.arange(len(self.attendees)) - np.repeat(np.cumsum(self.sizes) - self.sizes, self.sizes)
+        return groups
+
+    def index_matrices(self, population: np.ndarray) -> np.ndarray:
+        """(pop, num_groups, width) padded index matrices for a (pop, num_attendees) assignment array"""
+        order = np.argsort(population, axis=1, kind='stable')
+        matrices = np.full((len(population), len(self.sizes), self.width), self.pad, dtype=np.int64)
+        matrices[:, self.group_at, self.slot_at] = self.attendees[order]
+        return matrices
+
+    def _fitness(self, engine, population, conference_score, pool):
+        matrices = self.index_matrices(population)
+        rows = matrices.reshape(-1, self.width)
+        if pool is None:
+            scores = engine.score_batch(rows)
+        else:
+            scores = np.concatenate(list(pool.map(_score_rows, np.array_split(rows, self.workers))))
+        group_scores = scores.reshape(len(population), len(self.sizes))
+        self.moves_tried += len(population)
+        return np.array([conference_score(s) for s in group_scores]), matrices
+
+    def mutate(self, child: np.ndarray):
+        """Swap the groups of a few random pairs of attendees, in place"""
+        for _ in range(self.mutation_swaps):
+            i, j = self.rng.integers(len(child), size=2)
+            child[i], child[j] = child[j], child[i]
+
+    def crossover(self, parent_a: np.ndarray, parent_b: np.ndarray) -> np.ndarray:
+        """
+        Keep a random half of ``parent_a``'s groups whole, give everyone else their group in ``parent_b``
+        while it has room, and deal the rest into the groups that are still short
+        """
+        num_groups = len(self.sizes)
+        keep = self.rng.random(num_groups) < 0.5
+        child = np.where(keep[parent_a], parent_a, -1)
+        room = np.where(keep, 0, self.sizes)
+
+        rest = self.rng.permutation(np.flatnonzero(child < 0))
+        wanted = parent_b[rest]
+        by_group = np.argsort(wanted, kind='stable')
+        starts = np.searchsorted(wanted[by_group], np.arange(num_groups))
+        rank = np.empty(len(rest), dtype=np.int64)
+        rank[by_group] = np.arange(len(rest)) - starts[wanted[by_group]]
+        fits = rank < room[wanted]
+        child[rest[fits]] = wanted[fits]
+
+        room -= np.bincount(wanted[fits], minlength=num_groups)
+        child[rest[~fits]] = self.rng.permutation(np.repeat(np.arange(num_groups), room))
+        return child
+
+    def _select(self, fitness):
+        contenders = self.rng.integers(len(fitness), size=self.tournament_size)
+        return contenders[np.argmax(fitness[contenders])]
+
+    def run(self, engine, index_matrix, conference_score, score_change):
+        start_time = self._start()
+        start = self._layout(engine, np.asarray(index_matrix, dtype=np.int64))
+
+        population = np.tile(start, (self.population_size, 1))
+        for child in population[1:]:
+            self.mutate(child)
+
+        pool = None
+        if self.workers > 1:
+            pool = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker, initargs=(engine,))
+        try:
+            fitness, matrices = self._fitness(engine, population, conference_score, pool)
+            best = int(np.argmax(fitness))
+            best_score, best_matrix = fitness[best], matrices[best]
+            generation = 0
+            while self._progress(start_time) < 1:
+                generation += 1
+                ranked = np.argsort(-fitness)
+                children = [population[k].copy() for k in ranked[:self.elite]]
+                while len(children) < self.population_size:
+                    parent_a = population[self._select(fitness)]
+                    if self.rng.random() < self.crossover_rate:
+                        child = self.crossover(parent_a, population[self._select(fitness)])
+                    else:
+                        child = parent_a.copy()
+                    if self.rng.random() < self.mutation_rate:
+                        self.mutate(child)
+                    children.append(child)
+                population = np.array(children)
+                fitness, matrices = self._fitness(engine, population, conference_score, pool)
+
+                best = int(np.argmax(fitness))
+                if fitness[best] > best_score:
+                    best_score, best_matrix = fitness[best], matrices[best]
+                    self.moves_accepted += 1
+        finally:
+            if pool is not None:
+                pool.shutdown()
+
+        logging.debug(f"Genetic algorithm evaluated {self.moves_tried} individuals over {generation} generations, "
+                      f"best {best_score}")
+        return best_matrix, best_score
@@ -2,7 +2,7 @@ import random
 import numpy as np
 import networkx as nx
 import matplotlib.pyplot as plt
-from main import from_csv
+from registry import AttendeeRegistry
 
 
 # Set seed for reproducibility
@@ -10,8 +10,9 @@ random.seed(42)
 
 # Parse the attendee list
 csv_file = 'data/input.txt'
-attendees = from_csv(csv_file)
-attendee_names = [a.name for a in attendees]
+registry = AttendeeRegistry.from_csv(csv_file)
+attendees = registry.attendees
+friend_graph = registry.friend_graph
 units = sorted(np.unique([a.unit for a in attendees]))
 units = [str(u) for u in units]
 attendee_offsets = [0 for a in attendees]
@@ -46,16 +47,11 @@ for a in attendees:
     G.add_node(a.name)
 
 # Add weighted edges (edge length proportional to weight)
-for node in G.nodes:
-    a_idx = attendee_names.index(node)
-    a = attendees[a_idx]
-    for f in a.friends:
-        if f not in attendee_names:
-            continue
-        fa_idx = attendee_names.index(f)
-        fa = attendees[fa_idx]
-        age_gap = abs(a.age - fa.age)
-        G.add_edge(node, fa.name, weight=age_gap)
+for i, j, reciprocal in zip(friend_graph.sources.tolist(), friend_graph.out_indices.tolist(),
+                            friend_graph.reciprocal.tolist()):
+    a, fa = attendees[i], attendees[j]
+    age_gap = abs(a.age - fa.age)
+    G.add_edge(a.name, fa.name, weight=age_gap, reciprocal=reciprocal)
 
 # Draw the graph with edge lengths proportional to weights
 nx.draw(G, node_pos, with_labels=False, node_size=50, width=1)  # Edge width based on weight (width = weight * multiplier)
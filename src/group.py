@@ -1,12 +1,16 @@
 from attendee import Attendee
-import numpy as np
+from registry import AttendeeRegistry
+from scoring import AttendeeTable, ScoringEngine, score_cache_key, shared_score_cache
+from scoring_config import SCORING_CONFIG
 
-CONSTRAINT_WEIGHT = 1
-AGE_WEIGHT = 1
-GENDER_WEIGHT = 1
-UNIT_WEIGHT = 1
-COPPELL_WEIGHT = 1
-FRIEND_WEIGHT = 3
+# Group scores depend only on the members and the config, so every Group and Conference in the process shares
+# one cache
+_score_cache = shared_score_cache(SCORING_CONFIG)
+
+
+def make_engine(roster: AttendeeRegistry | list[Attendee]) -> ScoringEngine:
+    """Build a scoring engine over ``roster`` using the shared scoring configuration and score cache"""
+    return ScoringEngine(AttendeeTable(roster), SCORING_CONFIG, cache=_score_cache)
 
 class Group:
     def __init__(self, attendees: list[Attendee]):
@@ -20,6 +24,9 @@ class Group:
         attendees = [Attendee.from_dict(a) for a in data['attendees']]
         return cls(attendees)
 
+    def __reduce__(self):
+        return type(self), (self.attendees,)
+
     @property
     def has_coppell_ym(self):
         return any('Coppell' in a.unit for a in self.attendees if not a.is_female)
@@ -37,62 +44,12 @@ class Group:
         return any('Coppell' not in a.unit for a in self.attendees if a.is_female)
 
     def score(self):
-        # There are hard constraints that imply -inf score if not met
-        required_groupings = [['YW70', 'YW71'],
-                              ['YM75', 'YM76'],
-                              ['YM12', 'YM54', 'YM62'],
-                              # ['YM41', 'YW49'],
-        ]
-        required_separation = []
-
-        attendee_names = [a.name for a in self.attendees]
-
-        constraint_score = 0
-        for rg in required_groupings:
-            belong = [a in attendee_names for a in rg]
-            if any(belong):
-                if not all(belong):
-                    return -1e9
-                constraint_score += 1000
-        
-        for rs in required_separation:
-            belong = [a in attendee_names for a in rs]
-            if sum(belong) > 1:
-                return -1e9
-            constraint_score += 100
-        
-        constraint_score = CONSTRAINT_WEIGHT * constraint_score
-
-        age_range = max([a.age for a in self.attendees]) - min([a.age for a in self.attendees])
-        if age_range < 1.1:
-            age_range = 0
-        age_score = -AGE_WEIGHT*(age_range**5)
-
-        num_boys = sum(1 for a in self.attendees if not a.is_female)
-        num_girls = sum(1 for a in self.attendees if a.is_female)
-        gender_score = -GENDER_WEIGHT * ((num_boys - num_girls)^2)
-
-        units = [a.unit for a in self.attendees]
-        num_units = len(np.unique(units))
-
-        unit_score = UNIT_WEIGHT * ((COPPELL_WEIGHT * sum([self.has_coppell_ym, 
-                                                           self.has_coppell_yw, 
-                                                           self.has_non_coppell_ym, 
-                                                           self.has_non_coppell_yw]))
-                                    + num_units)
-
-        friend_score = 0
-        for a in self.attendees:
-            num_buddies = sum(b in attendee_names for b in a.friends)
-            if num_buddies == 1:
-                friend_score += 10
-            if num_buddies == 2:
-                friend_score += 8
-            if num_buddies == 3:
-                friend_score += 6
-        friend_score = FRIEND_WEIGHT * friend_score
-
-        return constraint_score + age_score + gender_score + unit_score + friend_score
+        key = score_cache_key(self.attendees)
+        score = _score_cache.get(key)
+        if score is None:
+            score = ScoringEngine(AttendeeTable(self.attendees), SCORING_CONFIG).score_group(range(len(self.attendees)))
+            _score_cache.put(key, score)
+        return score
 
     def __repr__(self):
         return f"Group({sorted([a.name for a in self.attendees])})"
@@ -101,7 +58,7 @@ class Group:
         # Show the group on one line with buddy info
         min_age = min([a.age for a in self.attendees])
         max_age = max([a.age for a in self.attendees])
-        attendee_names = [a.name for a in self.attendees]
+        attendee_names = {a.name for a in self.attendees}
         attendee_summaries = []
         attendee_lines = []
         buddy_less = []
@@ -0,0 +1,86 @@
+import json
+import logging
+import os
+import tempfile
+import numpy as np
+
+JOURNAL_SUFFIX = '.journal'
+
+
+def atomic_write_json(path, data):
+    """Write ``data`` to a temp file beside ``path`` and rename it into place, so ``path`` is never half written"""
+    _atomic_write(path, 'w', lambda f: json.dump(data, f))
+
+
+def atomic_write_npz(path, **arrays):
+    """Atomically write ``arrays`` to an uncompressed .npz file at ``path``"""
+    _atomic_write(path, 'wb', lambda f: np.savez(f, **arrays))
+
+
+def _atomic_write(path, mode, write):
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, mode) as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+class MoveJournal:
+    """
+    Append-only log of accepted moves since the last snapshot, one JSON line per move.  A move is the new
+    membership (attendee names) of every group it changed, tagged with its sequence number: snapshots record
+    the sequence of the last move they contain, so a resume skips the moves already in the snapshot even if
+    the journal was not cleared after it was written.
+    """
+    def __init__(self, path, fsync=True):
+        self.path = path
+        self.fsync = fsync
+        self.file = None
+
+    @classmethod
+    def for_snapshot(cls, json_file, fsync=True):
+        return cls(json_file + JOURNAL_SUFFIX, fsync=fsync)
+
+    def append(self, groups: list[list[str]], sequence: int):
+        if self.file is None:
+            self.file = open(self.path, 'a')
+        self.file.write(json.dumps({'sequence': sequence, 'groups': groups}) + '\n')
+        self.file.flush()
+        if self.fsync:
+            os.fsync(self.file.fileno())
+
+    def moves(self, after=0) -> list[tuple[int, list[list[str]]]]:
+        """
+        Every complete move in the journal with a sequence number above ``after``, as (sequence, groups); a
+        torn last line from a crash mid-append is ignored
+        """
+        if not os.path.exists(self.path):
+            return []
+        moves = []
+        with open(self.path, 'r') as f:
+            for line_number, line in enumerate(f):
+                try:
+                    entry = json.loads(line)
+                    if entry['sequence'] > after:
+                        moves.append((entry['sequence'], entry['groups']))
+                except (json.JSONDecodeError, KeyError):
+                    logging.warning(f"Ignoring unreadable journal entry {line_number + 1} in {self.path}")
+                    break
+        return moves
+
+    def clear(self):
+        """Drop every move; call once a snapshot containing them is safely on disk"""
+        self.close()
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
@@ -0,0 +1,191 @@
+import logging
+import time
+import numpy as np
+from scoring import ScoringEngine
+
+BATCH_SIZE = 256
+
+
+class SearchState:
+    """
+    Compact conference state for local search: a padded (num_groups, max_size) matrix of attendee ids, plus
+    each attendee's group and column so a swap is two array writes.
+    """
+    def __init__(self, engine: ScoringEngine, index_matrix: np.ndarray):
+        self.engine = engine
+        self.pad = engine.table.pad
+        self.index_matrix = np.array(index_matrix, dtype=np.int64)
+        self.group_of = np.full(self.pad, -1, dtype=np.int64)
+        self.slot_of = np.full(self.pad, -1, dtype=np.int64)
+        groups, slots = np.nonzero(self.index_matrix != self.pad)
+        self.group_of[self.index_matrix[groups, slots]] = groups
+        self.slot_of[self.index_matrix[groups, slots]] = slots
+        self.attendees = self.index_matrix[groups, slots]
+        self.group_scores = engine.score_batch(self.index_matrix)
+
+    @property
+    def can_swap(self) -> bool:
+        """Whether any two attendees are in different groups"""
+        return len(np.unique(self.group_of[self.attendees])) >= 2
+
+    def random_swaps(self, rng: np.random.Generator, count: int):
+        """Up to ``count`` random pairs of attendees in different groups"""
+        a1 = self.attendees[rng.integers(len(self.attendees), size=count)]
+        a2 = self.attendees[rng.integers(len(self.attendees), size=count)]
+        different = self.group_of[a1] != self.group_of[a2]
+        return a1[different], a2[different]
+
+    def swap_rows(self, a1, a2):
+        """The rows of both affected groups after each swap, and their scores"""
+        g1, g2 = self.group_of[a1], self.group_of[a2]
+        rows = np.arange(len(a1))
+        new_g1 = self.index_matrix[g1]
+        new_g1[rows, self.slot_of[a1]] = a2
+        new_g2 = self.index_matrix[g2]
+        new_g2[rows, self.slot_of[a2]] = a1
+        return g1, g2, self.engine.score_batch(new_g1), self.engine.score_batch(new_g2)
+
+    def apply_swap(self, a1, a2, score1, score2):
+        g1, g2 = self.group_of[a1], self.group_of[a2]
+        s1, s2 = self.slot_of[a1], self.slot_of[a2]
+        self.index_matrix[g1, s1], self.index_matrix[g2, s2] = a2, a1
+        self.group_of[a1], self.group_of[a2] = g2, g1
+        self.slot_of[a1], self.slot_of[a2] = s2, s1
+        self.group_scores[g1], self.group_scores[g2] = score1, score2
+
+
+class LocalSearch:
+    """
+    Base class for swap-based local search strategies.  ``run`` works on a copy of the index matrix and
+    returns the best matrix found and its conference score; the budget is whichever of ``iterations`` (moves
+    evaluated) and ``time_limit`` (seconds) runs out first.
+    """
+    def __init__(self, iterations=1_000_000, time_limit=None, batch_size=BATCH_SIZE, seed=None):
+        self.iterations = iterations
+        self.time_limit = time_limit
+        self.batch_size = batch_size
+        self.rng = np.random.default_rng(seed)
+        self.moves_tried = 0
+        self.moves_accepted = 0
+
+    def _start(self):
+        self.moves_tried = 0
+        self.moves_accepted = 0
+        return time.monotonic()
+
+    def _progress(self, start_time):
+        progress = self.moves_tried / self.iterations if self.iterations else 0.0
+        if self.time_limit:
+            progress = max(progress, (time.monotonic() - start_time) / self.time_limit)
+        return progress
+
+    def run(self, engine: ScoringEngine, index_matrix, conference_score, score_change):
+        """
+        ``conference_score(group_scores)`` and ``score_change(group_scores, g1, g2, new1, new2)`` define the
+        objective, as in Conference._conference_score and Conference._score_change; ``g2`` and ``new2`` may
+        be matrices, one column per further group a move touches.
+        """
+        raise NotImplementedError
+
+
+class SimulatedAnnealing(LocalSearch):
+    """
+    Simulated annealing over pairwise swaps.  Proposals are scored in vectorized batches against the state
+    at the start of the batch; after a swap is accepted, later proposals touching either of its groups are
+    stale and skipped.  The temperature falls from ``start_temperature`` to ``end_temperature`` with a
+    'geometric' or 'linear' cooling schedule over the budget.
+    """
+    def __init__(self, start_temperature=2.0, end_temperature=0.01, cooling='geometric', **kwargs):
+        super().__init__(**kwargs)
+        if cooling not in ('geometric', 'linear'):
+            raise ValueError(f"Unknown cooling schedule {cooling}")
+        self.start_temperature = start_temperature
+        self.end_temperature = end_temperature
+        self.cooling = cooling
+
+    def temperature(self, progress):
+        if self.cooling == 'linear':
+            return self.start_temperature + (self.end_temperature - self.start_temperature) * progress
+        return self.start_temperature * (self.end_temperature / self.start_temperature) ** progress
+
+    def run(self, engine, index_matrix, conference_score, score_change):
+        state = SearchState(engine, index_matrix)
+        best_matrix = state.index_matrix.copy()
+        best_score = current_score = conference_score(state.group_scores)
+        start_time = self._start()
+        if not state.can_swap:
+            return best_matrix, best_score
+
+        while (progress := self._progress(start_time)) < 1:
+            temperature = self.temperature(progress)
+            a1, a2 = state.random_swaps(self.rng, self.batch_size)
+            # Count every draw, including pairs within one group, so the budget always runs out
+            self.moves_tried += self.batch_size
+            g1, g2, new1, new2 = state.swap_rows(a1, a2)
+            deltas = score_change(state.group_scores, g1, g2, new1, new2)
+            thresholds = np.log(self.rng.random(len(deltas))) * temperature
+
+            touched = set()
+            for k in np.flatnonzero(deltas >= thresholds):
+                if g1[k] in touched or g2[k] in touched:
+                    continue
+                state.apply_swap(a1[k], a2[k], new1[k], new2[k])
+                touched.update((g1[k], g2[k]))
+                self.moves_accepted += 1
+                current_score = conference_score(state.group_scores)
+                if current_score > best_score:
+                    best_score = current_score
+                    best_matrix = state.index_matrix.copy()
+
+        logging.debug(f"Annealing tried {self.moves_tried} moves, accepted {self.moves_accepted}, best {best_score}")
+        return best_matrix, best_score
+
+
+class TabuSearch(LocalSearch):
+    """
+    Tabu search over pairwise swaps.  Each iteration scores ``candidates`` random swaps in one call and takes
+    the best one that does not send an attendee back to a group they left within the last ``tenure``
+    iterations, unless it beats the best conference found so far.
+    """
+    def __init__(self, tenure=10, candidates=BATCH_SIZE, **kwargs):
+        super().__init__(**kwargs)
+        self.tenure = tenure
+        self.candidates = candidates
+
+    def run(self, engine, index_matrix, conference_score, score_change):
+        state = SearchState(engine, index_matrix)
+        best_matrix = state.index_matrix.copy()
+        best_score = current_score = conference_score(state.group_scores)
+        tabu_until = np.zeros((engine.table.size, len(state.index_matrix)), dtype=np.int64)
+        start_time = self._start()
+        if not state.can_swap:
+            return best_matrix, best_score
+        iteration = 0
+
+        while self._progress(start_time) < 1:
+            iteration += 1
+            a1, a2 = state.random_swaps(self.rng, self.candidates)
+            # Count every draw, including pairs within one group, so the budget always runs out
+            self.moves_tried += self.candidates
+            if not len(a1):
+                continue
+            g1, g2, new1, new2 = state.swap_rows(a1, a2)
+            deltas = score_change(state.group_scores, g1, g2, new1, new2)
+
+            tabu = (tabu_until[a1, g2] > iteration) | (tabu_until[a2, g1] > iteration)
+            allowed = ~tabu | (current_score + deltas > best_score)
+            if not allowed.any():
+                continue
+            k = int(np.argmax(np.where(allowed, deltas, -np.inf)))
+
+            tabu_until[a1[k], g1[k]] = iteration + self.tenure
+            tabu_until[a2[k], g2[k]] = iteration + self.tenure
+            state.apply_swap(a1[k], a2[k], new1[k], new2[k])
+            self.moves_accepted += 1
+            current_score = conference_score(state.group_scores)
+            if current_score > best_score:
+                best_score = current_score
+                best_matrix = state.index_matrix.copy()
+
+        logging.debug(f"Tabu search tried {self.moves_tried} moves over {iteration} iterations, best {best_score}")
+        return best_matrix, best_score
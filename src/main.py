@@ -1,6 +1,5 @@
 import argparse
 import csv
-import json
 import logging
 import os
 import random
@@ -8,6 +7,7 @@ from attendee import Attendee
 from group import Group
 from conference import Conference
 from common import from_csv
+from candidate_cache import CANDIDATE_CACHE_DIR
 
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s:%(levelname)s:%(message)s')
@@ -35,17 +35,13 @@ def make_groups(attendees, num_groups):
     return groups
 
 
-def main(json_file):
-    with open(json_file, 'r') as f:
-        conference = Conference.from_dict(json.load(f), json_file)
+def main(json_file, candidate_cache_dir=CANDIDATE_CACHE_DIR):
+    conference = Conference.resume(json_file)
 
     logging.info(f"Starting conference score {conference.score()}")
-    conference.optimize()
+    conference.optimize(candidate_cache_dir=candidate_cache_dir)
     logging.info(f"Ending conference score {conference.score()}")
     conference.show(show_groups=False)
-
-    with open(conference.json_file, 'w') as f:
-        json.dump(conference.__dict__(), f)
         
 
 
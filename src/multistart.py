@@ -0,0 +1,72 @@
+import argparse
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from attendee import Attendee
+from common import from_csv
+from conference import Conference
+from main import make_groups, randomize_order
+
+STARTS = 8
+MULTISTART_DIR = os.path.join('results', 'multistart')
+
+
+def _run_start(attendees, num_groups, seed, json_file, optimize_kwargs):
+    """Process-pool entry point: optimize one start and return its seed, score and groups"""
+    conference = Conference(make_groups(randomize_order(attendees, seed), num_groups), json_file)
+    local_search = optimize_kwargs.get('local_search')
+    if local_search is not None:
+        # Each start gets its own random stream, not a copy of the parent's
+        local_search.rng = np.random.default_rng(seed)
+    score = conference.optimize(seed=seed, **optimize_kwargs)
+    logging.info(f"Start {seed} finished with score {score}")
+    return seed, float(score), conference.groups
+
+
+def multi_start(attendees: list[Attendee], num_groups, seeds=range(STARTS), workers=None, json_file=None,
+                json_dir=MULTISTART_DIR, **optimize_kwargs) -> tuple[Conference, dict]:
+    """
+    Optimize one conference per seed in a process pool, each from its own shuffled starting partition, and
+    keep the best.  ``optimize_kwargs`` go to Conference.optimize (e.g. time_limit, local_search).  Each start
+    journals to its own file in ``json_dir``; the best conference is saved to ``json_file`` if given.
+    Returns the best conference and {seed: score} for every start.
+    """
+    os.makedirs(json_dir, exist_ok=True)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(_run_start, attendees, num_groups, seed,
+                               os.path.join(json_dir, f'start_{seed}.json'), optimize_kwargs)
+                   for seed in seeds]
+        results = [future.result() for future in futures]
+
+    scores = {seed: score for seed, score, _ in results}
+    best_seed, best_score, best_groups = max(results, key=lambda result: result[1])
+    best = Conference(best_groups, json_file or os.path.join(json_dir, f'start_{best_seed}.json'))
+    if json_file is not None:
+        best.save()
+    values = np.array(list(scores.values()))
+    logging.info(f"Best of {len(scores)} starts is seed {best_seed} with {best_score}; "
+                 f"scores min {values.min()}, median {np.median(values)}, max {values.max()}")
+    return best, scores
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s:%(levelname)s:%(message)s')
+    parser = argparse.ArgumentParser(description="Best-of-N multi-start conference optimization")
+    parser.add_argument("--input", default='data/input.txt', help="Tab-separated roster")
+    parser.add_argument("--gender", choices=['ym', 'yw'], default='ym')
+    parser.add_argument("--num_groups", type=int, default=11)
+    parser.add_argument("--starts", type=int, default=STARTS)
+    parser.add_argument("--workers", type=int, default=None, help="Processes to use (default: every core)")
+    parser.add_argument("--time_limit", type=float, default=None, help="Seconds per start")
+    parser.add_argument("--solver_mode", default='enumerate')
+    parser.add_argument("--output", default=None, help="Path of the JSON file for the best conference")
+    args = parser.parse_args()
+
+    roster = [a for a in from_csv(args.input) if a.is_female == (args.gender == 'yw')]
+    best, scores = multi_start(roster, args.num_groups, seeds=range(args.starts), workers=args.workers,
+                               json_file=args.output or os.path.join('results', f'{args.gender}_multistart.json'),
+                               time_limit=args.time_limit, solver_mode=args.solver_mode)
+    for seed, score in sorted(scores.items(), key=lambda item: -item[1]):
+        print(f"seed {seed}: {score}")
+    best.show(show_groups=False)
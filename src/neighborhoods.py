@@ -0,0 +1,288 @@
+import logging
+import numpy as np
+from local_search import LocalSearch, SearchState
+from scoring import ScoringEngine
+
+MODES = ('best', 'first')
+# Each attendee is paired with this many of the next-oldest attendees
+AGE_NEIGHBORS = 8
+# In first-improvement mode, stale candidate swaps are scored this many at a time
+FIRST_IMPROVEMENT_CHUNK = 1024
+
+
+class SwapNeighborhood:
+    """
+    Restricted candidate-list neighborhood for Conference.get_best_swap.  It only considers swapping
+    attendee i into the group of one of their buddies (or of someone who named them as a buddy, or who
+    shares a required grouping with them), and swapping each attendee with their ``age_neighbors`` nearest
+    elders.  That is linear in the roster
+    rather than quadratic.
+
+    ``mode='best'`` returns the best candidate swap.  ``mode='first'`` scores candidates in chunks and
+    stops at the first that beats ``good_enough``, falling back to the best one scored.
+
+    Deltas are kept in a flat cache keyed by attendee pair.  Each entry is stamped with a hash of both
+    groups' members, so an entry goes stale exactly when either group changes, however the conference got
+    there (swaps, CBC windows, re-sorting), and nothing has to be invalidated by hand.
+    """
+    def __init__(self, engine: ScoringEngine, age_neighbors=AGE_NEIGHBORS, mode='best', seed=0):
+        if mode not in MODES:
+            raise ValueError(f"Unknown swap neighborhood mode {mode!r}; expected one of {MODES}")
+        self.table = table = engine.table
+        self.mode = mode
+        n = table.size
+        graph = table.friend_graph
+        # Both directions of every buddy edge: moving either attendee next to the other may help.  Members
+        # of a required grouping are partners in the same way, so a split grouping can be mended.
+        members, rules = np.array([(table.index[name], r) for r, rg in enumerate(engine.required_groupings)
+                                   for name in rg if name in table.index], dtype=np.int64).reshape(-1, 2).T
+        same_rule = (rules[:, None] == rules[None, :]) & (members[:, None] != members[None, :])
+        rule_sources, rule_targets = members[np.nonzero(same_rule)[0]], members[np.nonzero(same_rule)[1]]
+        self.friend_sources = np.concatenate([graph.sources, graph.out_indices, rule_sources])
+        self.friend_targets = np.concatenate([graph.out_indices, graph.sources, rule_targets])
+
+        order = np.argsort(table.ages, kind='stable')
+        steps = [(order[:-d], order[d:]) for d in range(1, min(age_neighbors, n - 1) + 1)]
+        self.age_pairs = (np.concatenate([p for p, _ in steps]) if steps else np.zeros(0, dtype=np.int64),
+                          np.concatenate([q for _, q in steps]) if steps else np.zeros(0, dtype=np.int64))
+
+        # Zobrist weights: a group's stamp is the wrapping sum of its members' weights
+        self.weights = np.append(np.random.default_rng(seed).integers(1, 2 ** 63, size=n, dtype=np.uint64),
+                                 np.uint64(0))
+        self.codes = np.zeros(0, dtype=np.int64)
+        self.deltas = np.zeros(0, dtype=float)
+        self.stamps = np.zeros((0, 2), dtype=np.uint64)
+        self.hits = 0
+        self.misses = 0
+
+    def __repr__(self):
+        return f"SwapNeighborhood({self.mode}, {len(self.codes)} cached, {self.hits} hits, {self.misses} misses)"
+
+    def candidates(self, index_matrix: np.ndarray, group_of: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Distinct candidate swaps (i, j), i < j, between attendees in different groups"""
+        pad = self.table.pad
+        # Swap i with every member of their buddy's group
+        members = index_matrix[group_of[self.friend_targets]]
+        i = np.repeat(self.friend_sources, members.shape[1])
+        j = members.reshape(-1)
+        i = np.concatenate([i, self.age_pairs[0]])
+        j = np.concatenate([j, self.age_pairs[1]])
+        keep = (j != pad) & (group_of[i] != group_of[np.minimum(j, pad - 1)])
+        i, j = np.minimum(i[keep], j[keep]), np.maximum(i[keep], j[keep])
+        codes = np.unique(i * pad + j)
+        return codes // pad, codes % pad
+
+    def search(self, conference, good_enough=np.inf, reuse=True):
+        """
+        The chosen candidate swap of ``conference`` as (g1, a1, g2, a2, delta) in slot coordinates, or None
+        if there are no candidates.  Pass ``reuse=False`` when a swap's delta depends on more than its two
+        groups (a conference score that weighs the lowest group).
+        """
+        if conference.engine.table is not self.table:
+            raise ValueError("This neighborhood was built for a different roster; build a new one")
+        pad = self.table.pad
+        index_matrix = conference.index_matrix()
+        group_scores = conference.group_scores(index_matrix)
+        slot_g, slot_a = np.nonzero(index_matrix != pad)
+        group_of = np.empty(pad, dtype=np.int64)
+        slot_of = np.empty(pad, dtype=np.int64)
+        group_of[index_matrix[slot_g, slot_a]] = slot_g
+        slot_of[index_matrix[slot_g, slot_a]] = slot_a
+        group_stamps = self.weights[index_matrix].sum(axis=1, dtype=np.uint64)
+
+        i, j = self.candidates(index_matrix, group_of)
+        if not len(i):
+            return None
+        g1, a1, g2, a2 = group_of[i], slot_of[i], group_of[j], slot_of[j]
+        codes = i * pad + j
+        stamps = np.stack([group_stamps[g1], group_stamps[g2]], axis=1)
+
+        # Look every candidate up in the flat cache
+        deltas = np.full(len(codes), np.nan)
+        at = np.minimum(np.searchsorted(self.codes, codes), max(len(self.codes) - 1, 0))
+        if reuse and len(self.codes):
+            fresh = (self.codes[at] == codes) & (self.stamps[at] == stamps).all(axis=1)
+            deltas[fresh] = self.deltas[at[fresh]]
+
+        chunk = FIRST_IMPROVEMENT_CHUNK if self.mode == 'first' else len(codes)
+        scored_now = 0
+        for start in range(0, len(codes), chunk):
+            window = slice(start, start + chunk)
+            stale = start + np.flatnonzero(np.isnan(deltas[window]))
+            self.hits += min(chunk, len(codes) - start) - len(stale)
+            scored_now += len(stale)
+            if len(stale):
+                deltas[stale] = conference.swap_delta(index_matrix, group_scores,
+                                                      g1[stale], a1[stale], g2[stale], a2[stale])
+            if self.mode == 'first' and (deltas[window] > good_enough).any():
+                break
+
+        scored = ~np.isnan(deltas)
+        self.codes, self.deltas, self.stamps = codes[scored], deltas[scored], stamps[scored]
+        self.misses += scored_now
+        conference.stats.count('moves_tried', scored_now)
+
+        good = np.flatnonzero(deltas > good_enough) if self.mode == 'first' else []
+        best = good[0] if len(good) else int(np.nanargmax(deltas))
+        return int(g1[best]), int(a1[best]), int(g2[best]), int(a2[best]), float(deltas[best])
+
+
+class ExchangeState(SearchState):
+    """
+    SearchState for moves that change group sizes.  Rows are widened to ``max_size`` and kept left-packed,
+    so a group's members sit in slots [0, size) and its first free slot is ``sizes[g]``.
+    """
+    def __init__(self, engine: ScoringEngine, index_matrix: np.ndarray, max_size: int):
+        index_matrix = np.asarray(index_matrix, dtype=np.int64)
+        pad = engine.table.pad
+        # Left-pack every row, then make room for groups to grow to max_size
+        order = np.argsort(index_matrix == pad, axis=1, kind='stable')
+        index_matrix = np.take_along_axis(index_matrix, order, axis=1)
+        extra = max(0, max_size - index_matrix.shape[1])
+        super().__init__(engine, np.pad(index_matrix, ((0, 0), (0, extra)), constant_values=pad))
+        self.sizes = (self.index_matrix != self.pad).sum(axis=1)
+
+    def random_chains(self, rng: np.random.Generator, count: int, length: int, closed: bool):
+        """
+        ``count`` random chains through distinct groups: member t of groups[:, t] moves to groups[:, t + 1]
+        for t < ``length``, taking the slot of the member leaving that group.  A closed chain (a cycle) has
+        ``length`` groups and its last mover takes the first mover's slot; an open one (an ejection chain, or
+        a single move when length is 1) has length + 1 groups and its last mover fills a free slot.
+        """
+        num_groups = len(self.index_matrix)
+        hops = length if closed else length + 1
+        if hops > num_groups:
+            return np.zeros((0, hops), dtype=np.int64), np.zeros((0, length), dtype=np.int64)
+        groups = np.argsort(rng.random((count, num_groups)), axis=1)[:, :hops]
+        sizes = self.sizes[groups[:, :length]]
+        slots = (rng.random((count, length)) * sizes).astype(np.int64)
+        movers = self.index_matrix[groups[:, :length], slots]
+        keep = (sizes > 0).all(axis=1)
+        return groups[keep], movers[keep]
+
+    def chain_rows(self, groups: np.ndarray, movers: np.ndarray, closed: bool):
+        """The rows of every group each chain touches after it is applied, and their scores"""
+        count, length = movers.shape
+        rows = self.index_matrix[groups]
+        incoming = np.roll(movers, 1, axis=1)
+        if not closed:
+            incoming[:, 0] = self.pad
+        chains = np.arange(count)[:, None]
+        rows[chains, np.arange(length)[None, :], self.slot_of[movers]] = incoming
+        if not closed:
+            rows[chains[:, 0], length, self.sizes[groups[:, length]]] = movers[:, -1]
+        scores = self.engine.score_batch(rows.reshape(-1, rows.shape[2])).reshape(groups.shape)
+        return rows, scores
+
+    def apply_chain(self, groups, movers, rows, scores, closed: bool):
+        length = len(movers)
+        new_slots = np.roll(self.slot_of[movers], -1)
+        if not closed:
+            new_slots[-1] = self.sizes[groups[-1]]
+        self.index_matrix[groups] = rows
+        self.group_of[movers] = groups[(np.arange(length) + 1) % len(groups)]
+        self.slot_of[movers] = new_slots
+        self.group_scores[groups] = scores
+        if not closed:
+            # Close the hole the first mover left by moving the group's last member into it
+            g, hole = groups[0], np.flatnonzero(rows[0] == self.pad)[0]
+            last = self.sizes[g] - 1
+            if hole != last:
+                member = self.index_matrix[g, last]
+                self.index_matrix[g, hole], self.index_matrix[g, last] = member, self.pad
+                self.slot_of[member] = hole
+            self.sizes[groups[0]] -= 1
+            self.sizes[groups[-1]] += 1
+
+
+class ExchangeSearch(LocalSearch):
+    """
+    Descent over neighborhoods a pairwise swap cannot reach: single-attendee moves ('move'), which change
+    group sizes within [``min_size``, ``max_size``] (by default the starting conference's smallest and
+    largest group); rotations of one attendee each among three groups ('cycle'); and ejection chains of two
+    to ``max_chain`` moves, where each mover displaces a member of the next group and the last one fills a
+    free slot ('chain').
+
+    Each batch draws ``batch_size`` random candidates from one neighborhood, in turn, and rescores only the
+    groups each candidate touches in one call.  Every improving candidate that touches no group changed
+    earlier in the batch is applied.  Pass it as Conference.optimize's ``local_search``.
+    """
+    def __init__(self, neighborhoods=('move', 'cycle', 'chain'), min_size=None, max_size=None, max_chain=4,
+                 iterations=200_000, **kwargs):
+        super().__init__(iterations=iterations, **kwargs)
+        unknown = set(neighborhoods).difference(('move', 'cycle', 'chain'))
+        if unknown:
+            raise ValueError(f"Unknown neighborhoods {sorted(unknown)}")
+        self.neighborhoods = list(neighborhoods)
+        self.min_size = min_size
+        self.max_size = max_size
+        self.max_chain = max_chain
+
+    def _candidates(self, state: ExchangeState, kind, min_size, max_size):
+        if kind == 'cycle':
+            closed, length = True, 3
+        else:
+            closed, length = False, 1 if kind == 'move' else int(self.rng.integers(2, self.max_chain + 1))
+        groups, movers = state.random_chains(self.rng, self.batch_size, length, closed)
+        if not closed:
+            fits = (state.sizes[groups[:, 0]] > min_size) & (state.sizes[groups[:, -1]] < max_size)
+            groups, movers = groups[fits], movers[fits]
+        return groups, movers, closed
+
+    @staticmethod
+    def _possible(state: ExchangeState, kind, min_size, max_size) -> bool:
+        """
+        Whether ``kind`` can ever produce a candidate from this state.  Only moves and chains change sizes,
+        and they cannot start when no group can give up a member to another with room, so this stays fixed.
+        """
+        if kind == 'cycle':
+            return (state.sizes > 0).sum() >= 3
+        donors = np.flatnonzero(state.sizes > max(min_size, 0))
+        receivers = np.flatnonzero(state.sizes < max_size)
+        can_move = len(donors) > 0 and len(receivers) > 0 and not (len(donors) == len(receivers) == 1
+                                                                   and donors[0] == receivers[0])
+        return can_move and (kind == 'move' or len(state.sizes) >= 3)
+
+    def run(self, engine, index_matrix, conference_score, score_change):
+        sizes = (np.asarray(index_matrix) != engine.table.pad).sum(axis=1)
+        min_size = sizes.min() if self.min_size is None else self.min_size
+        max_size = sizes.max() if self.max_size is None else self.max_size
+        state = ExchangeState(engine, index_matrix, max_size)
+        best_matrix = state.index_matrix.copy()
+        best_score = current_score = conference_score(state.group_scores)
+        start_time = self._start()
+        neighborhoods = [kind for kind in self.neighborhoods if self._possible(state, kind, min_size, max_size)]
+        if not neighborhoods:
+            logging.debug("Exchange search has no possible moves")
+            return best_matrix, best_score
+        batch = 0
+
+        while self._progress(start_time) < 1:
+            kind = neighborhoods[batch % len(neighborhoods)]
+            batch += 1
+            groups, movers, closed = self._candidates(state, kind, min_size, max_size)
+            # Count every draw, kept or not, so the budget always runs out
+            self.moves_tried += self.batch_size
+            if not len(groups):
+                continue
+            rows, scores = state.chain_rows(groups, movers, closed)
+            deltas = score_change(state.group_scores, groups[:, 0], groups[:, 1:], scores[:, 0], scores[:, 1:])
+
+            touched = set()
+            for k in np.argsort(-deltas):
+                if deltas[k] <= 0:
+                    break
+                if touched.intersection(groups[k].tolist()):
+                    continue
+                state.apply_chain(groups[k], movers[k], rows[k], scores[k], closed)
+                touched.update(groups[k].tolist())
+                self.moves_accepted += 1
+            if touched:
+                current_score = conference_score(state.group_scores)
+                if current_score > best_score:
+                    best_score = current_score
+                    best_matrix = state.index_matrix.copy()
+
+        logging.debug(f"Exchange search tried {self.moves_tried} moves, accepted {self.moves_accepted}, "
+                      f"best {best_score}")
+        return best_matrix, best_score
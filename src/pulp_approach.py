@@ -1,66 +1,124 @@
+import itertools
+import time
+import numpy as np
 import pulp
 from attendee import Attendee
 from group import Group
-from common import get_attendee_by_name
+from candidate_cache import load_candidates, save_candidates
+from candidates import age_window_candidates, required_blocks
 from objective import Objective
+from registry import AttendeeRegistry
+from scoring import BATCH_CHUNK_SIZE
+from stats import NULL_STATS, RunStats
 import logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s:%(levelname)s:%(message)s')
 
-def pulp_to_group(pulp_group, attendee_list: list[Attendee]):
-    return Group([get_attendee_by_name(name, attendee_list) for name in pulp_group['names']])
+def pulp_to_group(pulp_group, attendees: AttendeeRegistry | list[Attendee]):
+    if not isinstance(attendees, AttendeeRegistry):
+        attendees = AttendeeRegistry(attendees)
+    return Group([attendees.by_name(name) for name in pulp_group['names']])
 
-def solve_subset(subset: list[Attendee], max_group_size, min_group_size, max_groups):
-    obj_func = Objective(subset)
-
-    youths = [a for a in obj_func.attendees]
-
-    logging.debug(f"# Youth {len(youths)}, num_groups {max_groups}")
-
-    # create list of all possible groups
-    possible_groups = [tuple(c) for c in pulp.allcombinations(youths, max_group_size) if obj_func.screen(c, max_group_size, min_group_size)]
+SOLVER_MODES = ('enumerate', 'column_generation')
+MAX_COLUMN_GENERATION_ROUNDS = 50
+COLUMNS_PER_ROUND = 20
+REDUCED_COST_TOLERANCE = 1e-6
+# CBC needs a moment to load the model and find any integer solution
+MIN_SOLVE_TIME_LIMIT = 1
+# Options solve_subset passes on to CBC's integer solve: stop within this relative gap of the bound, use this
+# many threads, and start from the window's current groups
+SOLVER_OPTIONS = ('gap_rel', 'threads', 'warm_start')
 
-    logging.debug(f"Num possible groups {len(possible_groups)}")
 
-    # create a binary variable to state that a group setting is used
-    x = pulp.LpVariable.dicts(
-        "group", possible_groups, lowBound=0, upBound=1, cat=pulp.LpInteger
-    )
+def _build_model(registry: AttendeeRegistry, columns, column_scores, max_groups, relax=False, exact_groups=False):
+    """
+    Set-partitioning model over the candidate groups in ``columns``.  With relax=True the LP relaxation is
+    built instead, so the seating constraints carry dual values.  With exact_groups=True exactly
+    ``max_groups`` groups must be used.  Returns the model, its variables, the seating constraints in id order
+    and the group-count constraint.
+    """
+    if relax:
+        x = pulp.LpVariable.dicts("group", columns, lowBound=0)
+    else:
+        # create a binary variable to state that a group setting is used
+        x = pulp.LpVariable.dicts("group", columns, lowBound=0, upBound=1, cat=pulp.LpInteger)
 
     grouping_model = pulp.LpProblem("Youth_Conference_Grouping", pulp.LpMaximize)
 
-    grouping_model += pulp.lpSum([obj_func.score(group) * x[group] for group in possible_groups])
+    grouping_model += pulp.lpSum([column_scores[group] * x[group] for group in columns])
 
     # specify the maximum number of groups
-    grouping_model += (
-        pulp.lpSum([x[group] for group in possible_groups]) <= max_groups,
-        "Maximum_number_of_groups",
-    )
+    if exact_groups:
+        max_groups_constraint = pulp.lpSum([x[group] for group in columns]) == max_groups
+    else:
+        max_groups_constraint = pulp.lpSum([x[group] for group in columns]) <= max_groups
+    grouping_model += (max_groups_constraint, "Maximum_number_of_groups")
 
     # A youth must be in one and only one group
-    for youth in youths:
-        grouping_model += (
-            pulp.lpSum([x[group] for group in possible_groups if youth in group]) == 1,
-            f"Must_seat_{youth}",
-        )
+    groups_with = {youth: [] for youth in range(len(registry))}
+    for group in columns:
+        for youth in group:
+            groups_with[youth].append(x[group])
+    seat_constraints = []
+    for youth in range(len(registry)):
+        seat_constraint = pulp.lpSum(groups_with[youth]) == 1
+        grouping_model += (seat_constraint, f"Must_seat_{registry.names[youth]}")
+        seat_constraints.append(seat_constraint)
 
-    status = grouping_model.solve(pulp.PULP_CBC_CMD(msg=False))
+    return grouping_model, x, seat_constraints, max_groups_constraint
 
-    logging.debug(f"Status: {status}")
 
-    if status not in [1, 2]:
-        return [[]]
+def _check_solver_options(solver_options) -> dict:
+    solver_options = dict(solver_options or {})
+    unknown = set(solver_options).difference(SOLVER_OPTIONS)
+    if unknown:
+        raise ValueError(f"Unknown solver options {sorted(unknown)}, expected some of {SOLVER_OPTIONS}")
+    return solver_options
+
 
-    logging.debug(f"The chosen groups are out of a total of {len(possible_groups)}:")
+def _solve(model, stats: RunStats, phase='cbc_solve', time_limit=None, gap_rel=None, threads=None,
+           warm_start=False):
+    """
+    Solve with CBC, stopping after ``time_limit`` seconds (keeping the best integer solution found) if set, or
+    once the best solution is within ``gap_rel`` of the bound.  With ``warm_start``, the variables' initial
+    values are passed to CBC as its first incumbent.
+    """
+    if time_limit is not None:
+        time_limit = max(MIN_SOLVE_TIME_LIMIT, time_limit)
+    # CBC mishandles a MIP start's cutoff on a maximization (it reports the start as optimal), so a warm-started
+    # model is solved as the equivalent minimization
+    flip = warm_start and model.sense == pulp.LpMaximize
+    if flip:
+        model.sense, model.objective = pulp.LpMinimize, -model.objective
+    try:
+        with stats.timer(phase):
+            status = model.solve(pulp.PULP_CBC_CMD(msg=False, timeLimit=time_limit, gapRel=gap_rel, threads=threads,
+                                                   warmStart=warm_start))
+    finally:
+        if flip:
+            model.sense, model.objective = pulp.LpMaximize, -model.objective
+    stats.count(f"{phase}_status_{pulp.LpStatus.get(status, status)}")
+    return status
+
+
+def _set_warm_start(x, columns, start_columns):
+    """Give CBC the partition ``start_columns`` (all of them in ``columns``) as its starting solution"""
+    start_columns = set(start_columns)
+    for group in columns:
+        x[group].setInitialValue(1 if group in start_columns else 0)
+
+
+def _chosen_groups(registry: AttendeeRegistry, columns, column_scores, x):
+    logging.debug(f"The chosen groups are out of a total of {len(columns)}:")
     groups = []
-    for group in possible_groups:
+    for group in columns:
         if x[group].value() == 1.0:
-            group_attendees = [get_attendee_by_name(name, subset) for name in group]
+            group_attendees = registry.attendees_for(group)
             ages = [a.age for a in group_attendees]
             units = [a.unit for a in group_attendees]
             has_coppell = any(["Coppell" in u for u in units])
             has_other = any(["Coppell" not in u for u in units])
-            score = obj_func.score(group)
-            names = [name for name in group]
+            score = column_scores[group]
+            names = registry.names_for(group)
             groups.append({'names': names,
                            'score': score,
                            'max_age': max(ages),
@@ -74,6 +132,446 @@ def solve_subset(subset: list[Attendee], max_group_size, min_group_size, max_gro
 
     return groups
 
+
+def solve_subset(subset: list[Attendee], max_group_size, min_group_size, max_groups, mode='enumerate',
+                 initial_groups=None, cache_dir=None, stats: RunStats = NULL_STATS, time_limit=None,
+                 solver_options=None):
+    """
+    Partition ``subset`` into at most ``max_groups`` groups with the best total Objective score.
+
+    mode='enumerate' builds every group that passes the screen, reusing the candidates and scores saved in
+    ``cache_dir`` by an earlier solve of the same window (None, the default, disables the cache).
+    mode='column_generation' starts from ``initial_groups`` (lists of attendees, e.g. the groups being
+    dissolved) and generates columns on demand, which keeps memory bounded for larger windows.
+    Phase timings and counts are recorded in ``stats``.  ``time_limit`` bounds each CBC call, in seconds.
+
+    ``solver_options`` (see SOLVER_OPTIONS) tune the integer solve: ``gap_rel`` and ``threads`` go to CBC, and
+    ``warm_start`` hands it ``initial_groups`` as the incumbent (adding them as candidates if the screen
+    dropped them), so it can prune against them at once and stop early when they cannot be beaten.
+    """
+    solver_options = _check_solver_options(solver_options)
+    if mode == 'column_generation':
+        return solve_subset_by_column_generation(subset, max_group_size, min_group_size, max_groups, initial_groups,
+                                                 stats=stats, time_limit=time_limit, solver_options=solver_options)
+    if mode != 'enumerate':
+        raise ValueError(f"Unknown solver mode {mode}, expected one of {SOLVER_MODES}")
+
+    obj_func = Objective(subset)
+
+    registry = obj_func.registry
+    youths = list(range(len(registry)))
+
+    logging.debug(f"# Youth {len(youths)}, num_groups {max_groups}")
+
+    cached = None
+    if cache_dir is not None:
+        cached = load_candidates(obj_func, max_group_size, min_group_size, cache_dir)
+    if cached is not None:
+        stats.count('candidate_cache_hits')
+        possible_groups, scores = cached
+        group_scores = dict(zip(possible_groups, scores))
+    else:
+        # stream every group that passes the screen as a tuple of attendee ids, scoring them in vectorized chunks
+        candidate_stream = age_window_candidates(obj_func, max_group_size, min_group_size, stats=stats)
+        possible_groups = []
+        group_scores = {}
+        while True:
+            with stats.timer('enumeration'):
+                chunk = list(itertools.islice(candidate_stream, BATCH_CHUNK_SIZE))
+            if not chunk:
+                break
+            possible_groups.extend(chunk)
+            with stats.timer('scoring'):
+                group_scores.update(zip(chunk, obj_func.score_batch(obj_func.table.index_matrix(chunk),
+                                                                     use_cache=True).tolist()))
+        stats.count('candidates_generated', len(possible_groups))
+        if cache_dir is not None:
+            save_candidates(obj_func, max_group_size, min_group_size, possible_groups,
+                            [group_scores[g] for g in possible_groups], cache_dir)
+
+    start_columns = None
+    if solver_options.get('warm_start') and initial_groups is not None:
+        start_columns = [tuple(sorted(registry.ids_of(g))) for g in initial_groups]
+        missing = [c for c in dict.fromkeys(start_columns) if c not in group_scores]
+        if missing:
+            possible_groups = list(possible_groups) + missing
+            group_scores.update(zip(missing, obj_func.score_batch(obj_func.table.index_matrix(missing)).tolist()))
+
+    logging.debug(f"Num possible groups {len(possible_groups)}")
+
+    with stats.timer('model_build'):
+        grouping_model, x, _, _ = _build_model(registry, possible_groups, group_scores, max_groups)
+        if start_columns is not None:
+            _set_warm_start(x, possible_groups, start_columns)
+
+    status = _solve(grouping_model, stats, time_limit=time_limit,
+                    **dict(solver_options, warm_start=start_columns is not None))
+
+    logging.debug(f"Status: {status}")
+
+    if status not in [1, 2]:
+        return [[]]
+
+    return _chosen_groups(registry, possible_groups, group_scores, x)
+
+
+class ColumnPricer:
+    """
+    Pricing subproblem for column generation: searches for groups with positive reduced cost
+    score(group) - sum(seat duals) - group-count dual.  Required groupings are kept together as blocks.  Every
+    seed block is grown greedily inside the age window and then improved by add/drop/swap moves; all seeds
+    advance together, so each step scores the whole neighbourhood of every seed in one vectorized call.
+    """
+    def __init__(self, obj_func: Objective, max_group_size, min_group_size, stats: RunStats = NULL_STATS):
+        self.obj_func = obj_func
+        self.engine = obj_func.engine
+        self.stats = stats
+        self.max_group_size = max_group_size
+        self.min_group_size = min_group_size
+
+        registry = obj_func.registry
+        self.blocks = required_blocks(obj_func)
+
+        self.block_masks = np.zeros((len(self.blocks), len(registry)), dtype=bool)
+        for b, block in enumerate(self.blocks):
+            self.block_masks[b, list(block)] = True
+        self.block_sizes = self.block_masks.sum(axis=1)
+        ages = obj_func.table.ages
+        self.block_lo = np.array([ages[list(b)].min() for b in self.blocks])
+        self.block_hi = np.array([ages[list(b)].max() for b in self.blocks])
+
+    def _reduced_costs(self, member_masks, duals, mu):
+        idx = self.obj_func.table.mask_to_index_matrix(member_masks)
+        with self.stats.timer('scoring'):
+            rc = self.engine.score_batch(idx) - duals[idx].sum(axis=1) - mu
+        with self.stats.timer('screening'):
+            feasible = self.engine.screen_batch(idx, self.max_group_size, 0)
+        self.stats.count('candidates_generated', len(idx))
+        self.stats.count('candidates_screened_out', int(len(idx) - feasible.sum()))
+        return np.where(feasible, rc, -np.inf)
+
+    @staticmethod
+    def _best_per_state(state_of_move, move_rc, num_states):
+        """Index of the best move of each state (-1 if it has none) and its reduced cost"""
+        best_rc = np.full(num_states, -np.inf)
+        np.maximum.at(best_rc, state_of_move, move_rc)
+        best_move = np.full(num_states, -1)
+        is_best = (move_rc == best_rc[state_of_move]) & (move_rc > -np.inf)
+        # Reverse so the first best move of each state is the one that sticks
+        best_move[state_of_move[is_best][::-1]] = np.flatnonzero(is_best)[::-1]
+        return best_move, best_rc
+
+    def _grow(self, seeds, available, size_ok, duals, mu):
+        """Greedily add the best available block to every seed at once; keep each seed's best allowed-size state"""
+        num_states = len(seeds)
+        rows = np.arange(num_states)
+        states = np.zeros((num_states, len(self.blocks)), dtype=bool)
+        states[rows, seeds] = True
+        members = self.block_masks[seeds].copy()
+        sizes = self.block_sizes[seeds].copy()
+        lo, hi = self.block_lo[seeds].copy(), self.block_hi[seeds].copy()
+
+        best_rc = np.where(size_ok[sizes], self._reduced_costs(members, duals, mu), -np.inf)
+        best_states = states.copy()
+        active = np.ones(num_states, dtype=bool)
+        max_age_range = self.engine.max_age_range
+        while active.any():
+            fits = (active[:, None] & available[None, :] & ~states
+                    & (sizes[:, None] + self.block_sizes[None, :] <= self.max_group_size)
+                    & (self.block_hi[None, :] - lo[:, None] <= max_age_range)
+                    & (hi[:, None] - self.block_lo[None, :] <= max_age_range))
+            state_of_move, block_of_move = np.nonzero(fits)
+            if not len(state_of_move):
+                break
+            move_rc = self._reduced_costs(members[state_of_move] | self.block_masks[block_of_move], duals, mu)
+            best_move, step_rc = self._best_per_state(state_of_move, move_rc, num_states)
+            active &= best_move >= 0
+            moved = np.flatnonzero(active)
+            added = block_of_move[best_move[moved]]
+            states[moved, added] = True
+            members[moved] |= self.block_masks[added]
+            sizes[moved] += self.block_sizes[added]
+            lo[moved] = np.minimum(lo[moved], self.block_lo[added])
+            hi[moved] = np.maximum(hi[moved], self.block_hi[added])
+            better = active & size_ok[sizes] & (step_rc > best_rc)
+            best_rc[better] = step_rc[better]
+            best_states[better] = states[better]
+        return best_states, best_rc
+
+    def _improve(self, states, state_rc, available, size_ok, duals, mu):
+        """Best-improvement add/drop/swap local search on every state at once, keeping allowed sizes"""
+        states, state_rc = states.copy(), state_rc.copy()
+        num_states = len(states)
+        active = state_rc > -np.inf
+        while active.any():
+            sizes = states.astype(np.int64) @ self.block_sizes
+            members = (states.astype(np.int64) @ self.block_masks) > 0
+            inside = states & active[:, None]
+            outside = ~states & available[None, :] & active[:, None]
+
+            drop_s, drop_b = np.nonzero(inside & size_ok[sizes[:, None] - self.block_sizes[None, :]])
+            add_s, add_b = np.nonzero(outside & size_ok[np.minimum(sizes[:, None] + self.block_sizes[None, :],
+                                                                   len(size_ok) - 1)])
+            swap_sizes = sizes[:, None, None] - self.block_sizes[None, :, None] + self.block_sizes[None, None, :]
+            swap_s, swap_out, swap_in = np.nonzero(inside[:, :, None] & outside[:, None, :]
+                                                   & size_ok[np.clip(swap_sizes, 0, len(size_ok) - 1)])
+
+            new_states = np.concatenate([states[drop_s], states[add_s], states[swap_s]])
+            new_states[np.arange(len(drop_s)), drop_b] = False
+            offset = len(drop_s)
+            new_states[offset + np.arange(len(add_s)), add_b] = True
+            offset += len(add_s)
+            new_states[offset + np.arange(len(swap_s)), swap_out] = False
+            new_states[offset + np.arange(len(swap_s)), swap_in] = True
+            state_of_move = np.concatenate([drop_s, add_s, swap_s])
+            if not len(state_of_move):
+                break
+
+            new_members = np.concatenate([members[drop_s] & ~self.block_masks[drop_b],
+                                          members[add_s] | self.block_masks[add_b],
+                                          (members[swap_s] & ~self.block_masks[swap_out]) | self.block_masks[swap_in]])
+            move_rc = self._reduced_costs(new_members, duals, mu)
+            best_move, best_rc = self._best_per_state(state_of_move, move_rc, num_states)
+            active &= (best_move >= 0) & (best_rc > state_rc + REDUCED_COST_TOLERANCE)
+            moved = np.flatnonzero(active)
+            states[moved] = new_states[best_move[moved]]
+            state_rc[moved] = best_rc[moved]
+        return states, state_rc
+
+    def _search(self, available, size_ok, duals, mu):
+        """Best column found from each available seed block, as {column: reduced cost}"""
+        seeds = np.flatnonzero(available)
+        if not len(seeds):
+            return {}
+        states, state_rc = self._grow(seeds, available, size_ok, duals, mu)
+        states, state_rc = self._improve(states, state_rc, available, size_ok, duals, mu)
+        found = {}
+        for state, rc in zip(states, state_rc):
+            if rc == -np.inf:
+                continue
+            column = tuple(int(i) for i in np.flatnonzero(self.block_masks[state].any(axis=0)))
+            found[column] = max(rc, found.get(column, -np.inf))
+        return found
+
+    def _size_ok(self, sizes):
+        size_ok = np.zeros(len(self.obj_func.registry) + self.max_group_size + 2, dtype=bool)
+        size_ok[list(sizes)] = True
+        return size_ok
+
+    def price(self, duals, mu):
+        """Every distinct locally best column, as {column: reduced cost}"""
+        duals = np.append(duals, 0.0)
+        size_ok = self._size_ok(range(self.min_group_size, self.max_group_size + 1))
+        return self._search(np.ones(len(self.blocks), dtype=bool), size_ok, duals, mu)
+
+    def partition(self, found, duals, mu, num_groups):
+        """
+        Greedy partition of the whole subset into ``num_groups`` columns: repeatedly take the best-priced
+        column among ``found`` that is disjoint from those already taken and leaves a remainder that can still
+        be split, searching afresh among the unassigned attendees when none is left.  Feeding these to the
+        master keeps good integer solutions in the column pool, not only good fractional ones.
+        """
+        duals = np.append(duals, 0.0)
+        available = np.ones(len(self.blocks), dtype=bool)
+        assigned = set()
+        remaining = len(self.obj_func.registry)
+        columns = []
+        candidates = sorted(found, key=lambda column: -found[column])
+        for groups_left in range(num_groups, 0, -1):
+            sizes = [s for s in range(self.min_group_size, self.max_group_size + 1)
+                     if self.min_group_size * (groups_left - 1) <= remaining - s <= self.max_group_size * (groups_left - 1)]
+            column = next((c for c in candidates if len(c) in sizes and assigned.isdisjoint(c)), None)
+            if column is None:
+                fresh = self._search(available, self._size_ok(sizes), duals, mu)
+                if not fresh:
+                    return columns
+                column = max(fresh, key=fresh.get)
+            columns.append(column)
+            assigned.update(column)
+            available &= ~self.block_masks[:, list(column)].any(axis=1)
+            remaining -= len(column)
+        return columns
+
+
+def _age_ordered_partition(obj_func: Objective, num_groups):
+    order = np.argsort(obj_func.table.ages, kind='stable')
+    return [tuple(int(i) for i in chunk) for chunk in np.array_split(order, num_groups)]
+
+
+def solve_subset_by_column_generation(subset: list[Attendee], max_group_size, min_group_size, max_groups,
+                                      initial_groups=None, max_rounds=MAX_COLUMN_GENERATION_ROUNDS,
+                                      columns_per_round=COLUMNS_PER_ROUND, stats: RunStats = NULL_STATS,
+                                      time_limit=None, solver_options=None):
+    """
+    Column-generation version of solve_subset.  The restricted master starts from ``initial_groups`` (or an
+    age-ordered partition) so it is always feasible; its LP relaxation is re-solved with newly priced columns
+    until the pricer finds no improving group, then the restricted master is solved as an integer program.
+    With ``time_limit``, pricing stops once that many seconds have passed and the integer solve gets its own
+    ``time_limit``.  ``solver_options`` tune the integer solve as in solve_subset.
+    """
+    solver_options = _check_solver_options(solver_options)
+    deadline = None if time_limit is None else time.monotonic() + time_limit
+    obj_func = Objective(subset)
+    registry = obj_func.registry
+    pricer = ColumnPricer(obj_func, max_group_size, min_group_size, stats=stats)
+
+    if initial_groups is None:
+        columns = _age_ordered_partition(obj_func, max_groups)
+    else:
+        columns = [tuple(sorted(registry.ids_of(g))) for g in initial_groups]
+    column_scores = dict(zip(columns, obj_func.score_batch(obj_func.table.index_matrix(columns),
+                                                           use_cache=True).tolist()))
+
+    logging.debug(f"# Youth {len(registry)}, num_groups {max_groups}, column generation")
+
+    for round_number in range(max_rounds):
+        if deadline is not None and time.monotonic() >= deadline:
+            logging.debug(f"Column generation stopped by its time limit after {round_number} rounds")
+            break
+        stats.count('column_generation_rounds')
+        with stats.timer('model_build'):
+            master, _, seat_constraints, max_groups_constraint = _build_model(registry, columns, column_scores,
+                                                                              max_groups, relax=True)
+        status = _solve(master, stats, phase='lp_solve',
+                        time_limit=None if deadline is None else deadline - time.monotonic())
+        if status != 1:
+            logging.warning(f"Restricted master LP status {status} in round {round_number}")
+            break
+
+        bound = pulp.value(master.objective)
+        duals = np.array([c.pi for c in seat_constraints], dtype=float)
+        mu = max_groups_constraint.pi or 0.0
+        with stats.timer('pricing'):
+            found = pricer.price(duals, mu)
+        improving = [c for c in found if found[c] > REDUCED_COST_TOLERANCE and c not in column_scores]
+        new_columns = sorted(improving, key=lambda c: -found[c])[:columns_per_round]
+        if new_columns:
+            with stats.timer('pricing'):
+                new_columns += [c for c in pricer.partition(found, duals, mu, max_groups)
+                                if c not in column_scores and c not in new_columns]
+        logging.debug(f"Round {round_number}: master LP value {bound}, {len(new_columns)} new columns")
+        if not new_columns:
+            break
+        new_scores = obj_func.score_batch(obj_func.table.index_matrix(new_columns), use_cache=True).tolist()
+        column_scores.update(zip(new_columns, new_scores))
+        columns.extend(new_columns)
+
+    warm_start = bool(solver_options.get('warm_start')) and initial_groups is not None
+    with stats.timer('model_build'):
+        grouping_model, x, _, _ = _build_model(registry, columns, column_scores, max_groups)
+        if warm_start:
+            _set_warm_start(x, columns, columns[:len(initial_groups)])
+    status = _solve(grouping_model, stats, time_limit=time_limit, **dict(solver_options, warm_start=warm_start))
+
+    logging.debug(f"Status: {status}")
+
+    if status not in [1, 2]:
+        return [[]]
+
+    return _chosen_groups(registry, columns, column_scores, x)
+
+
+def max_reduced_cost_bound(engine, duals, mu, max_group_size, min_group_size) -> float:
+    """
+    An upper bound on the reduced cost score(group) - sum(seat duals) - ``mu`` of every group with a size in
+    the bounds.  Groups that violate no rule are bounded with the engine's score_upper_bounds: a group's
+    youngest and oldest members fix its age score and which buddies could be with it, so each such pair is
+    combined with the best members aged between them.  Groups that do violate one score the violation score,
+    less the smallest seat duals.
+    """
+    member_bounds, size_bounds, buddy_bounds = engine.score_upper_bounds(max_group_size, balance=duals)
+    graph = engine.table.friend_graph
+    order = np.argsort(engine.table.ages, kind='stable')
+    position = np.argsort(order)
+    n = len(order)
+    ages = engine.table.ages[order]
+    values = (member_bounds - duals)[order]
+    age_scores = engine.age_scores(ages[None, :] - ages[:, None])
+    # buddy_slots[i, p]: how many of the attendee at age position i's buddy slots name the one at position p
+    buddy_slots = np.zeros((n, n), dtype=np.int64)
+    np.add.at(buddy_slots, (position[graph.sources], position[graph.out_indices]), 1)
+    width = max(max_group_size - 2, 0)
+
+    best = -np.inf
+    if min_group_size <= 1:
+        best = (values + buddy_bounds[0]).max(initial=-np.inf) + size_bounds[1] + age_scores[0, 0]
+    for j in range(n - 1):
+        # window_values[i, m]: the most attendee i can add to a group spanning age positions j to j + m
+        slots = np.minimum(np.cumsum(buddy_slots[:, j:], axis=1), len(buddy_bounds) - 1)
+        window_values = values[:, None] + buddy_bounds[slots]
+        # For each oldest position l = j + m, the best members strictly between j and l
+        between = np.where(np.arange(j + 1, n)[:, None] < np.arange(j, n)[None, :], window_values[j + 1:], -np.inf)
+        top = np.full((n - j, width + 1), -np.inf)
+        top[:, 0] = 0.0
+        best_between = -np.sort(-between, axis=0)[:width].T
+        top[:, 1:best_between.shape[1] + 1] = np.cumsum(best_between, axis=1)
+        ends = window_values[j, 1:] + window_values[np.arange(j + 1, n), np.arange(1, n - j)] + age_scores[j, j + 1:]
+        for size in range(max(min_group_size, 2), max_group_size + 1):
+            best = max(best, (ends + top[1:, size - 2]).max(initial=-np.inf) + size_bounds[size])
+
+    lowest_duals = np.cumsum(np.sort(duals))
+    for size in range(min_group_size, min(max_group_size, len(duals)) + 1):
+        best = max(best, engine.violation_score - lowest_duals[size - 1])
+    return best - mu
+
+
+def partition_bound(subset: list[Attendee], num_groups, max_group_size, min_group_size, initial_groups,
+                    max_rounds=MAX_COLUMN_GENERATION_ROUNDS, columns_per_round=COLUMNS_PER_ROUND,
+                    stats: RunStats = NULL_STATS, time_limit=None) -> tuple[float, float]:
+    """
+    An upper bound on the total Objective score of any partition of ``subset`` into exactly ``num_groups``
+    groups with sizes in the bounds, starting from the feasible partition ``initial_groups``.
+
+    The LP relaxation of the set-partitioning model is solved by column generation as in
+    solve_subset_by_column_generation.  Pricing is heuristic, so the LP value alone is not a bound; instead
+    each round's duals give the Lagrangian (Farley) bound sum(seat duals) + num_groups * (mu + max reduced
+    cost), with the maximum over every group bounded by max_reduced_cost_bound.  Returns the best such bound
+    and the last restricted master LP value.
+    """
+    deadline = None if time_limit is None else time.monotonic() + time_limit
+    obj_func = Objective(subset)
+    registry = obj_func.registry
+    pricer = ColumnPricer(obj_func, max_group_size, min_group_size, stats=stats)
+
+    columns = [tuple(sorted(registry.ids_of(g))) for g in initial_groups]
+    column_scores = dict(zip(columns, obj_func.score_batch(obj_func.table.index_matrix(columns),
+                                                           use_cache=True).tolist()))
+    bound, lp_value = np.inf, -np.inf
+    for round_number in range(max_rounds):
+        if deadline is not None and time.monotonic() >= deadline:
+            logging.debug(f"Bounding stopped by its time limit after {round_number} rounds")
+            break
+        stats.count('bound_rounds')
+        with stats.timer('model_build'):
+            master, _, seat_constraints, num_groups_constraint = _build_model(registry, columns, column_scores,
+                                                                              num_groups, relax=True,
+                                                                              exact_groups=True)
+        status = _solve(master, stats, phase='lp_solve',
+                        time_limit=None if deadline is None else deadline - time.monotonic())
+        if status != 1:
+            logging.warning(f"Bounding master LP status {status} in round {round_number}")
+            break
+
+        lp_value = pulp.value(master.objective)
+        duals = np.array([c.pi for c in seat_constraints], dtype=float)
+        mu = num_groups_constraint.pi or 0.0
+        with stats.timer('bounding'):
+            max_reduced_cost = max_reduced_cost_bound(obj_func.engine, duals, mu, max_group_size, min_group_size)
+        bound = min(bound, duals.sum() + num_groups * (mu + max_reduced_cost))
+        logging.debug(f"Bounding round {round_number}: master LP value {lp_value}, bound {bound}")
+
+        with stats.timer('pricing'):
+            found = pricer.price(duals, mu)
+        improving = [c for c in found if found[c] > REDUCED_COST_TOLERANCE and c not in column_scores]
+        new_columns = sorted(improving, key=lambda c: -found[c])[:columns_per_round]
+        if not new_columns:
+            break
+        new_scores = obj_func.score_batch(obj_func.table.index_matrix(new_columns), use_cache=True).tolist()
+        column_scores.update(zip(new_columns, new_scores))
+        columns.extend(new_columns)
+    return bound, lp_value
+
+
 def iterate_by_groups(subset, total_groups, groups_per_search, youngest_first=True):
     min_group_size = len(subset) // total_groups
     max_group_size = min_group_size
@@ -96,8 +594,8 @@ def iterate_by_groups(subset, total_groups, groups_per_search, youngest_first=Tr
             logging.error("Did not solve correctly")
             return [{'error': 'Did not solve correctly', 'found_groups': found_groups}]
 
-        for name in first_group['names']:
-            subset.remove(get_attendee_by_name(name, subset))
+        chosen = set(first_group['names'])
+        subset[:] = [a for a in subset if a.name not in chosen]
         found_groups.append(first_group)
     groups = solve_subset(subset, max_group_size=max_group_size, min_group_size=min_group_size, max_groups=groups_per_search)
     found_groups.extend(groups)
@@ -0,0 +1,58 @@
+import hashlib
+import json
+from functools import cached_property
+import numpy as np
+from attendee import Attendee
+from common import from_csv
+from friend_graph import FriendGraph
+
+
+class AttendeeRegistry:
+    """
+    The roster, built once, with a dense integer id per attendee (their position in the roster).
+    Lookups by name or id are O(1), and buddy names are resolved to ids up front.
+    """
+    def __init__(self, attendees: list[Attendee]):
+        self.attendees = list(attendees)
+        self.names = np.array([a.name for a in self.attendees], dtype=object)
+        self.id_of = {a.name: i for i, a in enumerate(self.attendees)}
+        # Buddies who are not on this roster are dropped; repeated buddies are kept so they still count twice
+        self.friend_ids = [tuple(self.id_of[f] for f in a.friends if f in self.id_of) for a in self.attendees]
+        self.friend_graph = FriendGraph(self.friend_ids)
+        self._table = None
+
+    @classmethod
+    def from_csv(cls, csv_file_path):
+        return cls(from_csv(csv_file_path))
+
+    @cached_property
+    def fingerprint(self) -> str:
+        """Hash of every attendee's details in id order; saved solutions refer to attendees by id under it"""
+        return hashlib.sha256(json.dumps([a.__dict__() for a in self.attendees]).encode()).hexdigest()
+
+    def __len__(self):
+        return len(self.attendees)
+
+    def __iter__(self):
+        return iter(self.attendees)
+
+    def __contains__(self, name):
+        return name in self.id_of
+
+    def by_name(self, name) -> Attendee:
+        return self.attendees[self.id_of[name]]
+
+    def by_id(self, attendee_id) -> Attendee:
+        return self.attendees[attendee_id]
+
+    def ids(self, names) -> tuple[int, ...]:
+        return tuple(self.id_of[name] for name in names)
+
+    def ids_of(self, attendees: list[Attendee]) -> tuple[int, ...]:
+        return tuple(self.id_of[a.name] for a in attendees)
+
+    def attendees_for(self, ids) -> list[Attendee]:
+        return [self.attendees[i] for i in ids]
+
+    def names_for(self, ids) -> list[str]:
+        return self.names[list(ids)].tolist()
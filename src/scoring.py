@@ -0,0 +1,378 @@
+import json
+from collections import OrderedDict
+import numpy as np
+from attendee import Attendee
+from registry import AttendeeRegistry
+from scoring_config import COMPONENTS, SCORING_CONFIG, ScoringConfig
+
+BATCH_CHUNK_SIZE = 65536
+SCORE_CACHE_SIZE = 65536
+
+
+def _fifth_power(values: np.ndarray) -> np.ndarray:
+    # NumPy's SIMD pow can differ from Python's float pow in the last bit, so raise each distinct value with
+    # Python's to keep batch scores bit-identical to the scalar objective
+    distinct, inverse = np.unique(values, return_inverse=True)
+    return np.array([v ** 5 for v in distinct.tolist()], dtype=float)[inverse].reshape(values.shape)
+
+
+class ScoreCache:
+    """
+    Bounded LRU memo of group scores, keyed by score_cache_key.  Only share a cache between engines with the
+    same weights and rules (see shared_score_cache).
+    """
+    def __init__(self, max_size=SCORE_CACHE_SIZE):
+        self.max_size = max_size
+        self.scores = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.scores)
+
+    def __repr__(self):
+        return f"ScoreCache({len(self)}/{self.max_size} entries, {self.hits} hits, {self.misses} misses)"
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def get(self, key: frozenset):
+        """The cached score for ``key``, or None"""
+        score = self.scores.get(key)
+        if score is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self.scores.move_to_end(key)
+        return score
+
+    def put(self, key: frozenset, score: float):
+        self.scores[key] = score
+        self.scores.move_to_end(key)
+        while len(self.scores) > self.max_size:
+            self.scores.popitem(last=False)
+
+    def clear(self):
+        self.scores.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+# Attendee data -> process-wide token; a corrected attendee (e.g. new buddies) gets a new token
+_attendee_tokens = {}
+# Config and rules -> the ScoreCache every engine scoring with them shares
+_shared_caches = {}
+
+
+def attendee_token(attendee: Attendee) -> int:
+    """A process-wide id for everything about ``attendee`` that scoring reads"""
+    key = (attendee.name, attendee.age, attendee.unit, attendee.is_female, tuple(attendee.friends))
+    return _attendee_tokens.setdefault(key, len(_attendee_tokens))
+
+
+def score_cache_key(attendees) -> frozenset:
+    """The ScoreCache key of a group, whichever roster or engine scores it"""
+    return frozenset(attendee_token(a) for a in attendees)
+
+
+def shared_score_cache(config: ScoringConfig = SCORING_CONFIG, required_groupings=None,
+                       required_separations=None) -> ScoreCache:
+    """
+    The process-wide cache of engines scoring with ``config`` and exactly these rules (by default all of
+    ``config``'s), so windows and rosters built separately reuse each other's scores.
+    """
+    rules = config.as_dict()
+    if required_groupings is not None:
+        rules['required_groupings'] = required_groupings
+    if required_separations is not None:
+        rules['required_separations'] = required_separations
+    rules['required_groupings'] = sorted(sorted(rg) for rg in rules['required_groupings'])
+    rules['required_separations'] = sorted(sorted(rs) for rs in rules['required_separations'])
+    return _shared_caches.setdefault(json.dumps(rules, sort_keys=True), ScoreCache())
+
+
+class AttendeeTable:
+    """
+    Columnar view of a roster.  Row i describes the attendee with registry id i; one extra padding row
+    (index ``pad``) lets ragged groups be stored in a rectangular index matrix.
+    """
+    def __init__(self, roster: AttendeeRegistry | list[Attendee]):
+        if not isinstance(roster, AttendeeRegistry):
+            roster = AttendeeRegistry(roster)
+        self.registry = roster
+        self.attendees = roster.attendees
+        self.names = [a.name for a in self.attendees]
+        self.index = roster.id_of
+        self.size = len(self.attendees)
+        self.pad = self.size
+
+        n = self.size
+        ages = np.array([a.age for a in self.attendees], dtype=float)
+        self.ages = ages
+        self.ages_hi = np.append(ages, -np.inf)
+        self.ages_lo = np.append(ages, np.inf)
+
+        female = np.array([a.is_female for a in self.attendees], dtype=bool)
+        coppell = np.array(['Coppell' in a.unit for a in self.attendees], dtype=bool)
+        self.is_female = np.append(female, False)
+        self.is_male = np.append(~female, False)
+        self.is_coppell = np.append(coppell, False)
+        self.is_real = np.append(np.ones(n, dtype=bool), False)
+
+        self.units = sorted(set(a.unit for a in self.attendees))
+        unit_index = {u: i for i, u in enumerate(self.units)}
+        self.unit_codes = np.array([unit_index[a.unit] for a in self.attendees] + [len(self.units)], dtype=np.int64)
+
+        self.friend_graph = roster.friend_graph
+        self.cache_tokens = [attendee_token(a) for a in self.attendees]
+
+    def __getstate__(self):
+        # A worker process only needs the arrays, not the attendees they were built from
+        state = self.__dict__.copy()
+        state['registry'] = None
+        state['attendees'] = None
+        return state
+
+    def index_matrix(self, groups) -> np.ndarray:
+        """Pack a list of id sequences into a rectangular matrix padded with ``pad``."""
+        groups = [list(g) for g in groups]
+        width = max((len(g) for g in groups), default=0)
+        matrix = np.full((len(groups), width), self.pad, dtype=np.int64)
+        for row, g in enumerate(groups):
+            matrix[row, :len(g)] = g
+        return matrix
+
+    def mask_to_index_matrix(self, mask: np.ndarray) -> np.ndarray:
+        """Convert a (num_groups, size) membership bitmask into a padded index matrix."""
+        mask = np.asarray(mask, dtype=bool)
+        width = int(mask.sum(axis=1).max()) if len(mask) else 0
+        order = np.argsort(~mask, axis=1, kind='stable')[:, :width]
+        return np.where(np.take_along_axis(mask, order, axis=1), order, self.pad)
+
+
+class ScoringEngine:
+    """
+    Vectorized group objective over an AttendeeTable.  Scores one group, or a whole batch of groups given
+    as a padded index matrix or a membership bitmask, in a single pass.
+    """
+    def __init__(self, table: AttendeeTable, config: ScoringConfig = SCORING_CONFIG, rules_within_roster=False,
+                 cache: ScoreCache | None = None):
+        """
+        Compile ``config`` against ``table``.  With ``rules_within_roster`` (a solver window), only the rules
+        whose members are all on this roster apply; otherwise a grouping with a member missing from the
+        roster can never be complete.
+        """
+        self.table = table
+        self.config = config
+        self.cache = cache
+        self.weights = config.weights
+        self.grouping_bonus = config.grouping_bonus
+        self.separation_bonus = config.separation_bonus
+        self.violation_score = config.violation_score
+        self.max_age_range = config.max_age_range
+        self.age_range_grace = config.age_range_grace
+        self.friend_points = config.friend_points
+
+        self.required_groupings = config.required_groupings
+        self.required_separations = config.required_separations
+        if rules_within_roster:
+            self.required_groupings = [rg for rg in self.required_groupings if all(y in table.index for y in rg)]
+            self.required_separations = [rs for rs in self.required_separations if all(y in table.index for y in rs)]
+        self._compile_rules()
+
+        t = table
+        self.coppell_ym = t.is_male & t.is_coppell
+        self.coppell_yw = t.is_female & t.is_coppell
+        self.non_coppell_ym = t.is_male & ~t.is_coppell
+        self.non_coppell_yw = t.is_female & ~t.is_coppell
+
+    def _compile_rules(self):
+        """
+        Give every (rule, member) pair its own bit.  ``member_bits[i]`` has the bits of attendee i, so OR-ing
+        a group's rows gives every rule member present, and each rule is then checked against its mask in
+        constant time whatever the group's size.
+        """
+        rules = self.required_groupings + self.required_separations
+        num_bits = sum(len(rule) for rule in rules)
+        words = max(1, -(-num_bits // 64))
+        self.member_bits = np.zeros((self.table.size + 1, words), dtype=np.uint64)
+        masks = np.zeros((len(rules), words), dtype=np.uint64)
+        bit = 0
+        for r, rule in enumerate(rules):
+            for name in rule:
+                word, value = bit // 64, np.uint64(1) << np.uint64(bit % 64)
+                masks[r, word] |= value
+                # Names missing from the table keep their bit in the mask, so the rule can never be complete
+                if name in self.table.index:
+                    self.member_bits[self.table.index[name], word] |= value
+                bit += 1
+        self.grouping_masks = masks[:len(self.required_groupings)]
+        self.separation_masks = masks[len(self.required_groupings):]
+
+    def __getstate__(self):
+        # The cache, like the attendee tokens that key it, belongs to this process
+        state = self.__dict__.copy()
+        state['cache'] = None
+        return state
+
+    def _as_index_matrix(self, groups) -> np.ndarray:
+        if isinstance(groups, np.ndarray):
+            if groups.dtype == bool:
+                return self.table.mask_to_index_matrix(groups)
+            return groups.astype(np.int64, copy=False)
+        return self.table.index_matrix(groups)
+
+    def rule_members(self, idx: np.ndarray) -> np.ndarray:
+        """The OR of each row's member bits: which rule members every group holds"""
+        return np.bitwise_or.reduce(self.member_bits[idx], axis=1)
+
+    def groupings_present(self, bits: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """For each row's rule_members, which groupings it has any member of, and which it has all of"""
+        held = bits[:, None, :] & self.grouping_masks[None, :, :]
+        return held.any(axis=2), (held == self.grouping_masks[None, :, :]).all(axis=2)
+
+    def violations(self, idx: np.ndarray, bits: np.ndarray | None = None) -> np.ndarray:
+        """True for every row that splits a required grouping or joins a required separation."""
+        if bits is None:
+            bits = self.rule_members(idx)
+        violated = np.zeros(len(idx), dtype=bool)
+        if len(self.grouping_masks):
+            present, complete = self.groupings_present(bits)
+            violated |= (present & ~complete).any(axis=1)
+        if len(self.separation_masks):
+            held = bits[:, None, :] & self.separation_masks[None, :, :]
+            # Two or more bits set, in one word or across words
+            violated |= (((held & (held - np.uint64(1))) != 0).any(axis=2) | ((held != 0).sum(axis=2) > 1)).any(axis=1)
+        return violated
+
+    def age_ranges(self, idx: np.ndarray) -> np.ndarray:
+        return self.table.ages_hi[idx].max(axis=1) - self.table.ages_lo[idx].min(axis=1)
+
+    def age_scores(self, age_range: np.ndarray) -> np.ndarray:
+        age_range = np.where(age_range < self.age_range_grace, 0.0, age_range)
+        return -self.weights[COMPONENTS.index('age')] * _fifth_power(age_range)
+
+    def score_upper_bounds(self, max_size, balance=None) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        A separable relaxation of the objective.  A group of size s that violates no rule scores at most
+        ``size_bounds[s]`` plus age_scores of its age range plus, for each member, ``member_bounds`` (one unit
+        and their share of a grouping bonus) and ``buddy_bounds[c]``, the most buddy points they can earn when
+        only c of their buddy slots name someone who could be in the group (c is capped at the last entry).
+        The gender and Coppell terms take their best value for the size (-inf if no group of that size
+        exists).  Every weight must be non-negative.
+
+        A group that violates no rule has all of a grouping's members or none, so the grouping bonus may be
+        split among them in any way: evenly, or with ``balance`` (one value per attendee, e.g. LP duals) so that
+        every member's bound less their balance comes out the same.
+        """
+        if (self.weights < 0).any() or self.grouping_bonus < 0 or self.separation_bonus < 0:
+            raise ValueError("Score bounds need non-negative weights and bonuses")
+        constraint_weight, _, gender_weight, unit_weight, coppell_weight, friend_weight = self.weights
+        t = self.table
+        n = t.size
+
+        # Points for 0, 1, ... buddies, beyond which there are none; then the best for up to that many
+        buddy_bounds = friend_weight * np.maximum.accumulate(np.append(self.friend_points, 0))
+        member_bounds = unit_weight * np.ones(n)
+        for rg in self.required_groupings:
+            ids = [t.index[name] for name in rg if name in t.index]
+            if len(ids) < len(rg):
+                # Any group with one of these members violates the rule
+                continue
+            share = np.full(len(ids), constraint_weight * self.grouping_bonus / len(ids))
+            if balance is not None:
+                share += balance[ids] - balance[ids].mean()
+            member_bounds[ids] += share
+
+        num_boys, num_girls = int(t.is_male.sum()), int(t.is_female.sum())
+        num_flags = int(sum(flags[:n].any() for flags in (self.coppell_ym, self.coppell_yw, self.non_coppell_ym,
+                                                           self.non_coppell_yw)))
+        size_bounds = np.full(max_size + 1, -np.inf)
+        for size in range(1, max_size + 1):
+            boys = np.arange(max(0, size - num_girls), min(size, num_boys) + 1)
+            if not len(boys):
+                continue
+            gender_score = -gender_weight * ((boys - (size - boys)) ^ 2)
+            size_bounds[size] = (constraint_weight * self.separation_bonus * len(self.separation_masks)
+                                 + unit_weight * coppell_weight * min(size, num_flags) + gender_score.max())
+        return member_bounds, size_bounds, buddy_bounds
+
+    def _score_chunk(self, idx: np.ndarray) -> np.ndarray:
+        t = self.table
+        rows = np.arange(len(idx))[:, None]
+
+        constraint_weight, _, gender_weight, unit_weight, coppell_weight, friend_weight = self.weights
+        bits = self.rule_members(idx)
+        constraint_score = np.zeros(len(idx), dtype=np.int64)
+        if len(self.grouping_masks):
+            present, _ = self.groupings_present(bits)
+            constraint_score += self.grouping_bonus * present.sum(axis=1)
+        constraint_score += self.separation_bonus * len(self.separation_masks)
+        constraint_score = constraint_weight * constraint_score
+
+        age_score = self.age_scores(self.age_ranges(idx))
+
+        num_boys = t.is_male[idx].sum(axis=1)
+        num_girls = t.is_female[idx].sum(axis=1)
+        gender_score = -gender_weight * ((num_boys - num_girls) ^ 2)
+
+        units_present = np.zeros((len(idx), len(t.units) + 1), dtype=bool)
+        units_present[rows, t.unit_codes[idx]] = True
+        num_units = units_present[:, :len(t.units)].sum(axis=1)
+        num_flags = (self.coppell_ym[idx].any(axis=1).astype(np.int64)
+                     + self.coppell_yw[idx].any(axis=1)
+                     + self.non_coppell_ym[idx].any(axis=1)
+                     + self.non_coppell_yw[idx].any(axis=1))
+        unit_score = unit_weight * ((coppell_weight * num_flags) + num_units)
+
+        num_buddies = t.friend_graph.buddies_in_groups(idx)
+        friend_points = self.friend_points
+        points = np.where(num_buddies < len(friend_points),
+                          friend_points[np.minimum(num_buddies, len(friend_points) - 1)], 0)
+        friend_score = friend_weight * points.sum(axis=1)
+
+        total = constraint_score + age_score + gender_score + unit_score + friend_score
+        return np.where(self.violations(idx, bits), self.violation_score, total)
+
+    def _score_uncached(self, idx: np.ndarray) -> np.ndarray:
+        if len(idx) <= BATCH_CHUNK_SIZE:
+            return self._score_chunk(idx)
+        return np.concatenate([self._score_chunk(idx[i:i + BATCH_CHUNK_SIZE])
+                               for i in range(0, len(idx), BATCH_CHUNK_SIZE)])
+
+    def cache_keys(self, idx: np.ndarray) -> list[frozenset]:
+        tokens, pad = self.table.cache_tokens, self.table.pad
+        return [frozenset(tokens[i] for i in row if i != pad) for row in idx.tolist()]
+
+    def score_batch(self, groups, use_cache=False) -> np.ndarray:
+        """
+        Score many groups at once.  ``groups`` is a padded index matrix, a boolean membership mask of shape
+        (num_groups, table.size), or a list of id sequences.  With ``use_cache``, groups already in the
+        engine's cache are looked up and only the rest are scored.  Leave it off for one-off hypothetical
+        groups (swap proposals) so they do not evict groups that will be scored again.
+        """
+        idx = self._as_index_matrix(groups)
+        if not use_cache or self.cache is None:
+            return self._score_uncached(idx)
+        keys = self.cache_keys(idx)
+        scores = np.array([self.cache.get(k) for k in keys], dtype=float)
+        missing = np.flatnonzero(np.isnan(scores))
+        if len(missing):
+            scores[missing] = self._score_uncached(idx[missing])
+            for row in missing.tolist():
+                self.cache.put(keys[row], float(scores[row]))
+        return scores
+
+    def score_group(self, ids) -> float:
+        return float(self.score_batch([list(ids)], use_cache=True)[0])
+
+    def screen_batch(self, groups, max_size: int, min_size: int) -> np.ndarray:
+        """Vectorized hard-constraint screen: group size, required groupings/separations and age range."""
+        idx = self._as_index_matrix(groups)
+        sizes = (idx != self.table.pad).sum(axis=1)
+        ok = (sizes >= min_size) & (sizes <= max_size)
+        ok &= ~self.violations(idx)
+        ok &= self.age_ranges(idx) <= self.max_age_range
+        return ok
@@ -0,0 +1,51 @@
+import json
+import os
+import numpy as np
+
+SCORING_CONFIG_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data', 'scoring.json')
+# Order of the entries in ScoringConfig.weights
+COMPONENTS = ('constraint', 'age', 'gender', 'unit', 'coppell', 'friend')
+
+
+class ScoringConfig:
+    """
+    The one definition of the group objective: component weights, bonuses, the violation score, the age
+    limits, points per buddy, and the required groupings and separations.  Every ScoringEngine (Group,
+    Conference, Objective and the solvers) compiles it against its roster, so they cannot drift apart.
+    """
+    def __init__(self, weights: dict, grouping_bonus=0, separation_bonus=0, violation_score=-1e9, max_age_range=2,
+                 age_range_grace=1.1, friend_points=(0, 10, 8, 6), required_groupings=(), required_separations=()):
+        unknown = set(weights).difference(COMPONENTS)
+        if unknown:
+            raise ValueError(f"Unknown scoring components {sorted(unknown)}; expected {COMPONENTS}")
+        self.weights = np.array([weights.get(c, 0) for c in COMPONENTS])
+        self.grouping_bonus = grouping_bonus
+        self.separation_bonus = separation_bonus
+        self.violation_score = violation_score
+        self.max_age_range = max_age_range
+        self.age_range_grace = age_range_grace
+        self.friend_points = np.array(friend_points)
+        self.required_groupings = [list(rg) for rg in required_groupings]
+        self.required_separations = [list(rs) for rs in required_separations]
+
+    @classmethod
+    def from_file(cls, path=SCORING_CONFIG_FILE):
+        with open(path, 'r') as f:
+            return cls(**json.load(f))
+
+    def weight(self, component) -> float:
+        return self.weights[COMPONENTS.index(component)]
+
+    def as_dict(self) -> dict:
+        return {'weights': dict(zip(COMPONENTS, self.weights.tolist())),
+                'grouping_bonus': self.grouping_bonus,
+                'separation_bonus': self.separation_bonus,
+                'violation_score': self.violation_score,
+                'max_age_range': self.max_age_range,
+                'age_range_grace': self.age_range_grace,
+                'friend_points': self.friend_points.tolist(),
+                'required_groupings': self.required_groupings,
+                'required_separations': self.required_separations}
+
+
+SCORING_CONFIG = ScoringConfig.from_file()
@@ -0,0 +1,66 @@
+import json
+import numpy as np
+from attendee import Attendee
+from journal import atomic_write_json, atomic_write_npz
+from registry import AttendeeRegistry
+
+SOLUTION_SUFFIX = '.npz'
+ROSTER_SUFFIX = '.roster.json'
+# Bump when the layout of a solution file changes
+SOLUTION_FORMAT_VERSION = 1
+
+
+def is_solution_file(path) -> bool:
+    return str(path).endswith(SOLUTION_SUFFIX)
+
+
+def roster_path_for(solution_path) -> str:
+    """Where the roster a solution file refers to is kept by default: beside it"""
+    return solution_path[:-len(SOLUTION_SUFFIX)] + ROSTER_SUFFIX
+
+
+def save_roster(registry: AttendeeRegistry, path):
+    atomic_write_json(path, {'fingerprint': registry.fingerprint, 'attendees': [a.__dict__() for a in registry]})
+
+
+def load_roster(path) -> AttendeeRegistry:
+    with open(path, 'r') as f:
+        data = json.load(f)
+    registry = AttendeeRegistry([Attendee.from_dict(a) for a in data['attendees']])
+    if registry.fingerprint != data['fingerprint']:
+        raise ValueError(f"Roster {path} does not match its recorded fingerprint")
+    return registry
+
+
+def save_solution(path, registry: AttendeeRegistry, group_ids: list[tuple[int, ...]], sequence=0):
+    """
+    Atomically write groups as registry ids: ``ids`` holds every group's members back to back and group g is
+    ``ids[group_ptr[g]:group_ptr[g + 1]]``.  The roster's fingerprint is stored so a load can check it, and
+    ``sequence`` is the journal sequence of the last move the groups contain.
+    """
+    sizes = [len(ids) for ids in group_ids]
+    dtype = np.uint16 if len(registry) < np.iinfo(np.uint16).max else np.uint32
+    atomic_write_npz(path,
+                     version=np.array(SOLUTION_FORMAT_VERSION),
+                     fingerprint=np.array(registry.fingerprint),
+                     sequence=np.array(sequence),
+                     group_ptr=np.concatenate([[0], np.cumsum(sizes)]).astype(np.int64),
+                     ids=np.fromiter((i for ids in group_ids for i in ids), dtype=dtype, count=sum(sizes)))
+
+
+def load_solution(path, registry: AttendeeRegistry) -> list[np.ndarray]:
+    """Each group's registry ids, after checking the file was saved against ``registry``"""
+    with np.load(path, allow_pickle=False) as data:
+        version, fingerprint = int(data['version']), str(data['fingerprint'])
+        group_ptr, ids = data['group_ptr'], data['ids'].astype(np.int64)
+    if version != SOLUTION_FORMAT_VERSION:
+        raise ValueError(f"{path} has solution format {version}; expected {SOLUTION_FORMAT_VERSION}")
+    if fingerprint != registry.fingerprint:
+        raise ValueError(f"{path} was saved against a different roster")
+    return np.split(ids, group_ptr[1:-1])
+
+
+def load_sequence(path) -> int:
+    """The journal sequence saved with a solution (0 for files written before it was recorded)"""
+    with np.load(path, allow_pickle=False) as data:
+        return int(data['sequence']) if 'sequence' in data else 0
@@ -0,0 +1,86 @@
+import json
+import time
+from collections import defaultdict
+from contextlib import nullcontext
+
+
+class _Timer:
+    def __init__(self, stats, name):
+        self.stats = stats
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc_info):
+        self.stats.seconds[self.name] += time.perf_counter() - self.start
+        self.stats.calls[self.name] += 1
+
+
+class RunStats:
+    """
+    Per-phase wall-clock timers and event counters for one optimizer run.  Time a phase with
+    ``with stats.timer('cbc_solve'):`` and count events with ``stats.count('moves_tried', n)``.
+    """
+    enabled = True
+
+    def __init__(self):
+        self.seconds = defaultdict(float)
+        self.calls = defaultdict(int)
+        self.counters = defaultdict(int)
+
+    def timer(self, name):
+        return _Timer(self, name)
+
+    def count(self, name, n=1):
+        self.counters[name] += n
+
+    def merge(self, other: dict):
+        """Add in the totals from another run's as_dict(), e.g. one returned by a pool worker"""
+        for name, phase in other.get('phases', {}).items():
+            self.seconds[name] += phase['seconds']
+            self.calls[name] += phase['calls']
+        for name, n in other.get('counters', {}).items():
+            self.counters[name] += n
+
+    def as_dict(self) -> dict:
+        return {'phases': {name: {'seconds': self.seconds[name], 'calls': self.calls[name]}
+                           for name in sorted(self.seconds)},
+                'counters': dict(sorted(self.counters.items()))}
+
+    def to_json(self, json_file):
+        with open(json_file, 'w') as f:
+            json.dump(self.as_dict(), f, indent=2)
+
+    def summary(self) -> str:
+        phases = ', '.join(f"{name} {self.seconds[name]:.2f}s/{self.calls[name]}"
+                           for name in sorted(self.seconds, key=self.seconds.get, reverse=True))
+        counters = ', '.join(f"{name} {n}" for name, n in sorted(self.counters.items()))
+        return f"{phases}; {counters}"
+
+
+class _NullStats(RunStats):
+    """Stand-in used when instrumentation is off: every call is a no-op on shared objects"""
+    enabled = False
+    _context = nullcontext()
+
+    def __init__(self):
+        pass
+
+    def timer(self, name):
+        return self._context
+
+    def count(self, name, n=1):
+        pass
+
+    def merge(self, other: dict):
+        pass
+
+    def as_dict(self) -> dict:
+        return {}
+
+    def summary(self) -> str:
+        return ""
+
+
+NULL_STATS = _NullStats()
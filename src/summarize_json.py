@@ -1,10 +1,9 @@
 import json
-from pulp_approach import from_csv, get_attendee_by_name
 from group import Group
+from registry import AttendeeRegistry
 
 json_file = 'results/conference_None.json'
-attendees = from_csv('data/input.txt')
-names = [a.name for a in attendees]
+registry = AttendeeRegistry.from_csv('data/input.txt')
 
 with open(json_file, 'r') as f:
     data = json.load(f)
@@ -12,7 +11,7 @@ with open(json_file, 'r') as f:
 a=1
 
 for idx, json_group in enumerate(sorted(data, key=lambda g: g['max_age'])):
-    group = Group([get_attendee_by_name(name) for name in json_group['names']])
+    group = Group([registry.by_name(name) for name in json_group['names']])
     g_txt, n_bless, attendee_lines = group.get_summary()
     print(f"Group {idx+1}\t{g_txt}")
     for al in attendee_lines:
@@ -0,0 +1,91 @@
+import argparse
+import csv
+import logging
+import numpy as np
+from attendee import Attendee
+
+# Shape of data/input.txt: roughly half young women, ages 13-18, ~20 youth per ward, a quarter of buddy slots
+# empty, buddies always the same gender, mostly from the same ward and within about a year of age, and about
+# half of all buddy choices returned
+FEMALE_FRACTION = 0.46
+MIN_AGE = 13.0
+MAX_AGE = 19.0
+UNIT_SIZE = 20
+BUDDY_SLOTS = 3
+EMPTY_BUDDY_FRACTION = 0.25
+SAME_UNIT_FRACTION = 0.73
+BUDDY_AGE_SCALE = 0.6
+RECIPROCATE_FRACTION = 0.5
+# Keeps made-up names apart from the real roster's, so the real required groupings never apply to them
+NAME_PREFIX = 'SYN_'
+
+CSV_FIELDS = ["Participant's Ward", 'Participant Code', 'Buddy1', 'Buddy2', 'Buddy3', 'Age']
+
+
+def synthetic_roster(num_attendees: int, seed=None) -> list[Attendee]:
+    """A reproducible made-up roster of ``num_attendees`` youth with a realistic buddy graph"""
+    rng = np.random.default_rng(seed)
+    is_female = rng.random(num_attendees) < FEMALE_FRACTION
+    ages = np.round(rng.uniform(MIN_AGE, MAX_AGE, num_attendees), 2)
+    num_units = max(1, round(num_attendees / UNIT_SIZE))
+    # Ward sizes vary several-fold, as they do in the real roster
+    units = rng.choice(num_units, size=num_attendees, p=rng.dirichlet(np.full(num_units, 4.0)))
+
+    names = []
+    counts = {False: 0, True: 0}
+    for female in is_female.tolist():
+        counts[female] += 1
+        names.append(f"{NAME_PREFIX}{'YW' if female else 'YM'}{counts[female]}")
+
+    friends = [[] for _ in range(num_attendees)]
+    named_by = [[] for _ in range(num_attendees)]
+    wanted = BUDDY_SLOTS - rng.binomial(BUDDY_SLOTS, EMPTY_BUDDY_FRACTION, size=num_attendees)
+    for i in rng.permutation(num_attendees).tolist():
+        # Return some of the choices that name this attendee before making new ones
+        for j in named_by[i]:
+            if len(friends[i]) < wanted[i] and j not in friends[i] and rng.random() < RECIPROCATE_FRACTION:
+                friends[i].append(j)
+        while len(friends[i]) < wanted[i]:
+            pool = (is_female == is_female[i])
+            pool[i] = False
+            pool[friends[i]] = False
+            if rng.random() < SAME_UNIT_FRACTION and (pool & (units == units[i])).any():
+                pool &= units == units[i]
+            if not pool.any():
+                break
+            candidates = np.flatnonzero(pool)
+            weights = np.exp(-np.abs(ages[candidates] - ages[i]) / BUDDY_AGE_SCALE)
+            j = int(rng.choice(candidates, p=weights / weights.sum()))
+            friends[i].append(j)
+            named_by[j].append(i)
+
+    attendees = []
+    for i in range(num_attendees):
+        buddies = [names[j] for j in friends[i]] + [None] * (BUDDY_SLOTS - len(friends[i]))
+        attendees.append(Attendee(name=names[i], age=float(ages[i]), unit=f"Unit{units[i] + 1}",
+                                  is_female=bool(is_female[i]), friends=buddies))
+    return attendees
+
+
+def write_roster(attendees: list[Attendee], csv_file_path):
+    """Write ``attendees`` in the tab-separated layout common.from_csv reads"""
+    with open(csv_file_path, 'w', newline='') as csvfile:
+        writer = csv.DictWriter(csvfile, fieldnames=CSV_FIELDS, delimiter='\t')
+        writer.writeheader()
+        for a in attendees:
+            row = {"Participant's Ward": a.unit, 'Participant Code': a.name, 'Age': a.age}
+            for slot, friend in enumerate(a.friends):
+                row[f'Buddy{slot + 1}'] = friend or ''
+            writer.writerow(row)
+    logging.info(f"Wrote {len(attendees)} synthetic attendees to {csv_file_path}")
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s:%(levelname)s:%(message)s')
+    parser = argparse.ArgumentParser(description="Generate a synthetic youth conference roster")
+    parser.add_argument("num_attendees", type=int)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--output", default='data/synthetic.txt', help="Path of the tab-separated roster to write")
+    args = parser.parse_args()
+
+    write_roster(synthetic_roster(args.num_attendees, seed=args.seed), args.output)
@@ -0,0 +1,74 @@
+import heapq
+import itertools
+import numpy as np
+
+PRIORITIES = ('score', 'buddyless')
+# A window may skip over up to this many groups (in age order) between its youngest and oldest group
+WINDOW_REACH = 2
+
+
+class WindowScheduler:
+    """
+    Chooses which groups improve_by_pulp dissolves next.  Candidate windows are every set of ``size`` groups
+    spanning at most ``size + reach`` consecutive groups in age order, so near but non-adjacent groups can be
+    re-partitioned together.  They are ranked in a priority queue by how many groups they skip over (so
+    consecutive windows come first), then by how many members have no buddy in their group (``priority=
+    'buddyless'``) or by their worst group score (``priority='score'``).
+
+    A window whose solve found nothing better is remembered as locally optimal and skipped.  Windows are
+    keyed by the membership of their groups, so changing any group makes every window containing it dirty
+    again.
+    """
+    def __init__(self, priority='buddyless', reach=WINDOW_REACH):
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown window priority {priority!r}; expected one of {PRIORITIES}")
+        self.priority = priority
+        self.reach = reach
+        self.solved = set()
+        self.skipped = 0
+
+    def __repr__(self):
+        return f"WindowScheduler({self.priority}, {len(self.solved)} windows solved, {self.skipped} skipped)"
+
+    @staticmethod
+    def window_key(group_keys: list[frozenset], window) -> frozenset:
+        return frozenset(group_keys[i] for i in window)
+
+    def candidate_windows(self, num_groups, size) -> list[tuple[int, ...]]:
+        size = min(size, num_groups)
+        return [(start,) + rest for start in range(num_groups - size + 1)
+                for rest in itertools.combinations(range(start + 1, min(num_groups, start + size + self.reach)),
+                                                   size - 1)]
+
+    def _priority(self, window, group_scores, buddyless):
+        skipped = window[-1] - window[0] + 1 - len(window)
+        scores = group_scores[list(window)]
+        if self.priority == 'buddyless':
+            return skipped, -int(buddyless[list(window)].sum()), float(scores.min())
+        return skipped, float(scores.min()), float(scores.sum())
+
+    def next_windows(self, group_keys: list[frozenset], group_scores: np.ndarray, buddyless: np.ndarray, size,
+                     count=1, rng=None) -> list[tuple[int, ...]]:
+        """
+        Up to ``count`` non-overlapping windows of ``size`` group indices, most promising first, skipping
+        those already solved.  Ties are broken by ``rng`` if given, else by window order.
+        """
+        heap = []
+        for order, window in enumerate(self.candidate_windows(len(group_keys), size)):
+            if self.window_key(group_keys, window) in self.solved:
+                self.skipped += 1
+                continue
+            tiebreak = rng.random() if rng is not None else order
+            heap.append((self._priority(window, group_scores, buddyless), tiebreak, window))
+        heapq.heapify(heap)
+
+        windows, used = [], set()
+        while heap and len(windows) < count:
+            _, _, window = heapq.heappop(heap)
+            if used.isdisjoint(window):
+                windows.append(window)
+                used.update(window)
+        return windows
+
+    def mark_solved(self, group_keys: list[frozenset], window):
+        self.solved.add(self.window_key(group_keys, window))